@@ -0,0 +1,90 @@
+"""Import-time budget for the scrapers package.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter for
+every module in ``BUDGETS_MS``, reports the median cumulative import time
+over several runs, and lists any heavy dependency that was pulled in at
+import time. With ``--check`` the exit status is non-zero when a module goes
+over budget or imports a deferred dependency eagerly.
+
+    python -m benchmarks.import_time [--runs N] [--check]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+BUDGETS_MS = {
+    "scrapers.models": 200.0,
+    "scrapers.base": 300.0,
+    "scrapers.daemon": 300.0,
+    "scrapers.atcoder": 300.0,
+    "scrapers.codechef": 300.0,
+    "scrapers.codeforces": 300.0,
+    "scrapers.cses": 300.0,
+}
+
+DEFERRED = (
+    "bs4",
+    "curl_cffi",
+    "httpx",
+    "lxml",
+    "requests",
+    "scrapling",
+    "urllib3",
+)
+
+
+def _measure(module: str) -> tuple[float, list[str]]:
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = (part.strip() for part in line[12:].split("|"))
+        if name == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000.0, proc.stdout.split()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<22} {'median ms':>10} {'budget ms':>10}  eager imports")
+    for module, budget in BUDGETS_MS.items():
+        samples: list[float] = []
+        eager: list[str] = []
+        for _ in range(args.runs):
+            ms, eager = _measure(module)
+            samples.append(ms)
+        median = statistics.median(samples)
+        over = median > budget or bool(eager)
+        failed = failed or over
+        mark = " !" if over else ""
+        print(
+            f"{module:<22} {median:>10.1f} {budget:>10.1f}  "
+            f"{', '.join(eager) or '-'}{mark}"
+        )
+
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
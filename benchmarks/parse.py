@@ -0,0 +1,254 @@
+"""Parser throughput over ``tests/fixtures`` and scaled-up synthetic pages.
+
+Every recorded fixture page is run through the extraction function its
+scraper uses, plus synthetic workloads built from the fixtures: a full
+26-problem Codeforces contest page and a 50-page AtCoder archive walk.
+BeautifulSoup-based parsers are run once per available HTML backend and
+must extract identical data, so a faster parser can never silently change
+what gets scraped.
+
+For each case the median wall time is reported as pages/sec, together with
+the tracemalloc peak during one parse and the memory blocks and KiB still
+held by its result. ``--save`` writes the numbers to a baseline JSON file;
+``--baseline`` compares against one and fails when throughput drops or peak
+memory grows by more than ``--tolerance``.
+
+    python -m benchmarks.parse [--runs N] [--parser NAME ...]
+                               [--save FILE] [--baseline FILE]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from scrapers import atcoder, codechef, codeforces, cses, soup
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = ROOT / "tests" / "fixtures"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "parse_baseline.json"
+
+PARSERS = ("html.parser", "lxml")
+# Regex-only parsers do not depend on the HTML backend.
+NO_BACKEND = "-"
+
+
+@dataclass
+class Case:
+    name: str
+    fn: Callable[[str], Any]
+    pages: list[str]
+    uses_soup: bool = True
+
+
+@dataclass
+class Result:
+    case: str
+    parser: str
+    pages: int
+    ms_per_page: float
+    pages_per_s: float
+    peak_kib: float
+    retained_kib: float
+    retained_blocks: int
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def _codeforces_contest_page(problems: int) -> str:
+    """The 1550 problems page grown to ``problems`` holders, lettered A.."""
+    html = _fixture("codeforces/1550_problems.html")
+    chunks = codeforces._split_holders(html)
+    head = html[: html.index(chunks[0])]
+    holders, last = chunks[:-1], chunks[-1]
+    out = [head]
+    for i in range(problems):
+        chunk = last if i == problems - 1 else holders[i % len(holders)]
+        letter = chr(ord("A") + i)
+        out.append(re.sub(r'problemindex="\w+"', f'problemindex="{letter}"', chunk, 1))
+    return "".join(out)
+
+
+def _each(fn: Callable[[str], Any]) -> Callable[[list[str]], list[Any]]:
+    return lambda pages: [fn(p) for p in pages]
+
+
+def _cases() -> list[Case]:
+    def page(name: str, fn: Callable[[str], Any], uses_soup: bool = True) -> Case:
+        return Case(name, fn, [_fixture(name)], uses_soup)
+
+    return [
+        page("atcoder/contests.html", atcoder._parse_archive_page),
+        page("atcoder/abc100_tasks.html", atcoder._parse_tasks_list),
+        page("atcoder/task_abc100_a.html", atcoder._parse_problem_page),
+        page("atcoder/task_abc100_b.html", atcoder._parse_problem_page),
+        page("atcoder/task_abc100_c.html", atcoder._parse_problem_page),
+        page("atcoder/task_abc100_d.html", atcoder._parse_problem_page),
+        page("codeforces/1550_problems.html", codeforces._parse_all_blocks),
+        page("cses/contests.html", cses.parse_categories, uses_soup=False),
+        page("cses/task_1068.html", cses.parse_tests, uses_soup=False),
+        page("cses/task_1621.html", cses.parse_tests, uses_soup=False),
+        page("codechef/P1209.html", codechef._extract_memory_limit, uses_soup=False),
+        Case(
+            "synthetic/codeforces_26_problems",
+            codeforces._parse_all_blocks,
+            [_codeforces_contest_page(26)],
+        ),
+        Case(
+            "synthetic/atcoder_archive_50_pages",
+            _each(atcoder._parse_archive_page),
+            [_fixture("atcoder/contests.html")] * 50,
+        ),
+    ]
+
+
+def _available(parser: str) -> bool:
+    return parser == "html.parser" or importlib.util.find_spec(parser) is not None
+
+
+def _use(parser: str) -> None:
+    if parser == NO_BACKEND:
+        return
+    os.environ[soup.PARSER_ENV] = parser
+    soup.default_parser.cache_clear()
+
+
+def _call(case: Case) -> Any:
+    return case.fn(case.pages[0]) if len(case.pages) == 1 else case.fn(case.pages)
+
+
+def _measure(case: Case, parser: str, runs: int) -> tuple[Any, Result]:
+    _use(parser)
+    output = _call(case)
+    samples: list[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _call(case)
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+
+    # tracemalloc slows everything down, so memory gets a run of its own.
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        kept = _call(case)
+        _, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().compare_to(before, "filename")
+    finally:
+        tracemalloc.stop()
+    del kept
+
+    pages = len(case.pages)
+    return output, Result(
+        case=case.name,
+        parser=parser,
+        pages=pages,
+        ms_per_page=round(median * 1000 / pages, 3),
+        pages_per_s=round(pages / median, 1) if median else 0.0,
+        peak_kib=round((peak - base) / 1024, 1),
+        retained_kib=round(sum(s.size_diff for s in stats) / 1024, 1),
+        retained_blocks=sum(s.count_diff for s in stats),
+    )
+
+
+def _key(r: dict[str, Any]) -> str:
+    return f"{r['case']} [{r['parser']}]"
+
+
+def _regressions(
+    results: list[Result], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    known = {_key(r): r for r in baseline.get("results", [])}
+    out: list[str] = []
+    for r in map(asdict, results):
+        old = known.get(_key(r))
+        if not old:
+            continue
+        if r["pages_per_s"] < old["pages_per_s"] * (1 - tolerance):
+            out.append(
+                f"{_key(r)}: {r['pages_per_s']} pages/s, baseline {old['pages_per_s']}"
+            )
+        if r["peak_kib"] > old["peak_kib"] * (1 + tolerance):
+            out.append(
+                f"{_key(r)}: peak {r['peak_kib']} KiB, baseline {old['peak_kib']}"
+            )
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--parser", action="append", choices=PARSERS)
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        nargs="?",
+        const=DEFAULT_BASELINE,
+        help=f"compare with a saved baseline (default {DEFAULT_BASELINE.name})",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    parsers = [p for p in (args.parser or PARSERS) if _available(p)]
+    results: list[Result] = []
+    mismatched: list[str] = []
+    print(
+        f"{'case':<38} {'parser':<12}{'pages':>6}{'ms/page':>10}{'pages/s':>10}"
+        f"{'peak KiB':>10}{'kept KiB':>10}{'blocks':>8}"
+    )
+    for case in _cases():
+        outputs = []
+        for p in parsers if case.uses_soup else [NO_BACKEND]:
+            output, r = _measure(case, p, args.runs)
+            outputs.append(output)
+            results.append(r)
+            print(
+                f"{r.case:<38} {r.parser:<12}{r.pages:>6}{r.ms_per_page:>10.2f}"
+                f"{r.pages_per_s:>10.1f}{r.peak_kib:>10.1f}{r.retained_kib:>10.1f}"
+                f"{r.retained_blocks:>8}"
+            )
+        if any(o != outputs[0] for o in outputs[1:]):
+            mismatched.append(case.name)
+
+    for name in mismatched:
+        print(f"output differs between parsers: {name}")
+
+    regressions: list[str] = []
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = _regressions(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"regression: {line}")
+    if args.save:
+        args.save.write_text(
+            json.dumps(
+                {
+                    "python": sys.version.split()[0],
+                    "runs": args.runs,
+                    "results": [asdict(r) for r in results],
+                },
+                indent=2,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+
+    return 1 if mismatched or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
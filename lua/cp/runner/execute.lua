@@ -6,6 +6,7 @@
 ---@field mled boolean
 ---@field peak_mb number
 ---@field signal string|nil
+---@field ok boolean|nil verdict from scripts/check.py, when the runner compared the output
 
 ---@class SubstitutableCommand
 ---@field source string substituted via '{source}'
@@ -36,6 +36,7 @@ local constants = require('cp.constants')
 local execute = require('cp.runner.execute')
 local logger = require('cp.log')
 local state = require('cp.state')
+local utils = require('cp.utils')
 
 ---@type PanelState
 local panel_state = {
@@ -99,10 +100,23 @@ local function build_command(cmd, substitutions)
   return execute.build_command(cmd, substitutions)
 end
 
----@param test_case RanTestCase
+---@class TestCaseResult
+---@field status "pass"|"fail"|"tle"|"mle"
+---@field actual string
+---@field actual_highlights Highlight[]
+---@field error string
+---@field stderr string
+---@field time_ms number
+---@field code integer
+---@field ok boolean
+---@field signal string?
+---@field tled boolean
+---@field mled boolean
+---@field rss_mb number
+
 ---@param debug boolean?
----@param on_complete fun(result: { status: "pass"|"fail"|"tle"|"mle", actual: string, actual_highlights: Highlight[], error: string, stderr: string, time_ms: number, code: integer, ok: boolean, signal: string?, tled: boolean, mled: boolean, rss_mb: number })
-local function run_single_test_case(test_case, debug, on_complete)
+---@return string[]
+local function run_command(debug)
   local source_file = state.get_source_file()
 
   local binary_file = debug and state.get_debug_file() or state.get_binary_file()
@@ -112,72 +126,106 @@ local function run_single_test_case(test_case, debug, on_complete)
   local language = state.get_language() or platform_config.default_language
   local eff = config.runtime.effective[state.get_platform() or ''][language]
   local run_template = eff and eff.commands and eff.commands.run or {}
-  local cmd = build_command(run_template, substitutions)
-  local stdin_content = (test_case.input or '') .. '\n'
-  local timeout_ms = (panel_state.constraints and panel_state.constraints.timeout_ms) or 0
-  local memory_mb = panel_state.constraints and panel_state.constraints.memory_mb or 0
+  return build_command(run_template, substitutions)
+end
 
-  execute.run(cmd, stdin_content, timeout_ms, memory_mb, function(r)
-    local ansi = require('cp.ui.ansi')
-    local out = r.stdout or ''
-    local highlights = {}
-    if out ~= '' then
-      if config.ui.ansi then
-        local parsed = ansi.parse_ansi_text(out)
-        out = table.concat(parsed.lines, '\n')
-        highlights = parsed.highlights
-      else
-        out = out:gsub('\027%[[%d;]*[a-zA-Z]', '')
-      end
+---@param test_case RanTestCase
+---@param r ExecuteResult
+---@return TestCaseResult
+local function evaluate(test_case, r)
+  local ansi = require('cp.ui.ansi')
+  local out = r.stdout or ''
+  local highlights = {}
+  if out ~= '' then
+    if config.ui.ansi then
+      local parsed = ansi.parse_ansi_text(out)
+      out = table.concat(parsed.lines, '\n')
+      highlights = parsed.highlights
+    else
+      out = out:gsub('\027%[[%d;]*[a-zA-Z]', '')
     end
+  end
 
-    local max_lines = config.ui.panel.max_output_lines
-    local lines = vim.split(out, '\n')
-    if #lines > max_lines then
-      local trimmed = {}
-      for i = 1, max_lines do
-        table.insert(trimmed, lines[i])
-      end
-      table.insert(trimmed, string.format('... (output trimmed after %d lines)', max_lines))
-      out = table.concat(trimmed, '\n')
+  local max_lines = config.ui.panel.max_output_lines
+  local lines = vim.split(out, '\n')
+  if #lines > max_lines then
+    local trimmed = {}
+    for i = 1, max_lines do
+      table.insert(trimmed, lines[i])
     end
+    table.insert(trimmed, string.format('... (output trimmed after %d lines)', max_lines))
+    out = table.concat(trimmed, '\n')
+  end
 
-    local expected = test_case.expected or ''
-    local ok = normalize_lines(out) == normalize_lines(expected)
+  -- scripts/runner.py already compared the full output with check.py.
+  local ok = r.ok
+  if ok == nil then
+    ok = normalize_lines(out) == normalize_lines(test_case.expected or '')
+  end
 
-    local signal = r.signal
-    if not signal and r.code and r.code >= 128 then
-      signal = constants.signal_codes[r.code]
-    end
+  local signal = r.signal
+  if not signal and r.code and r.code >= 128 then
+    signal = constants.signal_codes[r.code]
+  end
 
-    local status
-    if r.tled then
-      status = 'tle'
-    elseif r.mled then
-      status = 'mle'
-    elseif ok then
-      status = 'pass'
-    else
-      status = 'fail'
-    end
+  local status
+  if r.tled then
+    status = 'tle'
+  elseif r.mled then
+    status = 'mle'
+  elseif ok then
+    status = 'pass'
+  else
+    status = 'fail'
+  end
+
+  return {
+    status = status,
+    actual = out,
+    actual_highlights = highlights,
+    error = (r.code ~= 0 and not ok) and out or '',
+    stderr = '',
+    time_ms = r.time_ms,
+    code = r.code,
+    ok = ok,
+    signal = signal,
+    tled = r.tled or false,
+    mled = r.mled or false,
+    rss_mb = r.peak_mb or 0,
+  }
+end
 
-    on_complete({
-      status = status,
-      actual = out,
-      actual_highlights = highlights,
-      error = (r.code ~= 0 and not ok) and out or '',
-      stderr = '',
-      time_ms = r.time_ms,
-      code = r.code,
-      ok = ok,
-      signal = signal,
-      tled = r.tled or false,
-      mled = r.mled or false,
-      rss_mb = r.peak_mb or 0,
-    })
+---@param test_case RanTestCase
+---@param debug boolean?
+---@param on_complete fun(result: TestCaseResult)
+local function run_single_test_case(test_case, debug, on_complete)
+  local cmd = run_command(debug)
+  local stdin_content = (test_case.input or '') .. '\n'
+  local timeout_ms = (panel_state.constraints and panel_state.constraints.timeout_ms) or 0
+  local memory_mb = panel_state.constraints and panel_state.constraints.memory_mb or 0
+
+  execute.run(cmd, stdin_content, timeout_ms, memory_mb, function(r)
+    on_complete(evaluate(test_case, r))
   end)
 end
 
+---@param tc RanTestCase
+---@param r TestCaseResult
+local function apply_result(tc, r)
+  tc.status = r.status
+  tc.actual = r.actual
+  tc.actual_highlights = r.actual_highlights
+  tc.error = r.error
+  tc.stderr = r.stderr
+  tc.time_ms = r.time_ms
+  tc.code = r.code
+  tc.ok = r.ok
+  tc.signal = r.signal
+  tc.tled = r.tled
+  tc.mled = r.mled
+  tc.rss_mb = r.rss_mb
+end
+
 ---@return boolean
 function M.load_test_cases()
   local tcs = cache.get_test_cases(
@@ -246,23 +294,102 @@ function M.run_test_case(index, debug, on_complete)
 
   tc.status = 'running'
   run_single_test_case(tc, debug, function(r)
-    tc.status = r.status
-    tc.actual = r.actual
-    tc.actual_highlights = r.actual_highlights
-    tc.error = r.error
-    tc.stderr = r.stderr
-    tc.time_ms = r.time_ms
-    tc.code = r.code
-    tc.ok = r.ok
-    tc.signal = r.signal
-    tc.tled = r.tled
-    tc.mled = r.mled
-    tc.rss_mb = r.rss_mb
-
+    apply_result(tc, r)
     on_complete(true)
   end)
 end
 
+--- Run every selected test case at once through scripts/runner.py, which
+--- spreads them over a process pool and streams one NDJSON result per case.
+---@param to_run integer[]
+---@param debug boolean?
+---@param on_each? fun(index: integer, total: integer)
+---@param on_finish fun()
+local function run_parallel(to_run, debug, on_each, on_finish)
+  local timeout_ms = (panel_state.constraints and panel_state.constraints.timeout_ms) or 0
+  local memory_mb = panel_state.constraints and panel_state.constraints.memory_mb or 0
+  local runner = vim.fn.fnamemodify(utils.get_plugin_path() .. '/scripts/runner.py', ':p')
+  local cmd = {
+    'uv',
+    'run',
+    runner,
+    '--timeout-ms',
+    tostring(timeout_ms),
+    '--memory-mb',
+    tostring(memory_mb),
+    -- The same comparison as normalize_lines, which judges runs without it.
+    '--check',
+    'lines',
+    '--',
+  }
+  vim.list_extend(cmd, run_command(debug))
+
+  local cases = {}
+  for _, index in ipairs(to_run) do
+    local tc = panel_state.test_cases[index]
+    tc.status = 'running'
+    table.insert(
+      cases,
+      vim.json.encode({
+        index = index,
+        input = (tc.input or '') .. '\n',
+        expected = tc.expected or '',
+      })
+    )
+  end
+
+  local finished = 0
+  local pending = ''
+  local function on_line(line)
+    local ok, ev = pcall(vim.json.decode, line, { luanil = { object = true } })
+    if not ok or type(ev) ~= 'table' or not ev.index then
+      return
+    end
+    local tc = panel_state.test_cases[ev.index]
+    if tc then
+      apply_result(tc, evaluate(tc, ev))
+    end
+    finished = finished + 1
+    if on_each then
+      on_each(finished, #to_run)
+    end
+  end
+
+  vim.system(cmd, {
+    stdin = table.concat(cases, '\n') .. '\n',
+    text = true,
+    stdout = function(_, data)
+      if not data then
+        return
+      end
+      pending = pending .. data
+      local lines = vim.split(pending, '\n', { plain = true })
+      pending = table.remove(lines)
+      vim.schedule(function()
+        for _, line in ipairs(lines) do
+          on_line(line)
+        end
+      end)
+    end,
+  }, function(r)
+    vim.schedule(function()
+      if r.code ~= 0 then
+        logger.log(
+          ('Test runner failed: %s'):format(vim.trim(r.stderr or '')),
+          vim.log.levels.ERROR
+        )
+        for _, index in ipairs(to_run) do
+          local tc = panel_state.test_cases[index]
+          if tc.status == 'running' then
+            tc.status = 'fail'
+          end
+        end
+      end
+      on_finish()
+    end)
+  end)
+end
+
 ---@param indices? integer[]
 ---@param debug boolean?
 ---@param on_each? fun(index: integer, total: integer)
@@ -276,14 +403,23 @@ function M.run_all_test_cases(indices, debug, on_each, on_done)
     end
   end
 
+  local function finish()
+    logger.log(
+      ('Finished %s %d test cases.'):format(debug and 'debugging' or 'running', #to_run),
+      vim.log.levels.INFO,
+      true
+    )
+    on_done(panel_state.test_cases)
+  end
+
+  if vim.fn.executable('uv') == 1 then
+    run_parallel(to_run, debug, on_each, finish)
+    return
+  end
+
   local function run_next(pos)
     if pos > #to_run then
-      logger.log(
-        ('Finished %s %d test cases.'):format(debug and 'debugging' or 'running', #to_run),
-        vim.log.levels.INFO,
-        true
-      )
-      on_done(panel_state.test_cases)
+      finish()
       return
     end
 
@@ -20,21 +20,234 @@ local function syshandle(result)
   return { success = true, data = data }
 end
 
+local function scraper_env()
+  local env = vim.fn.environ()
+  env.VIRTUAL_ENV = ''
+  env.PYTHONPATH = ''
+  env.CONDA_PREFIX = ''
+  return env
+end
+
+---@class ScraperOpts
+---@field sync? boolean
+---@field ndjson? boolean
+---@field on_event? fun(ev: table)
+---@field on_exit? fun(result: table)
+
+---@class ScraperRequest
+---@field on_event? fun(ev: table)
+---@field on_exit fun(result: table)
+---@field last? table
+
+---@class ScraperDaemon
+---@field handle uv.uv_process_t
+---@field stdin uv.uv_pipe_t
+---@field next_id integer
+---@field pending table<integer, ScraperRequest>
+
+---@type ScraperDaemon|nil
+local daemon = nil
+
+---@param d ScraperDaemon
+---@param msg table
+local function daemon_dispatch(d, msg)
+  if msg.method == 'event' then
+    local params = msg.params or {}
+    local req = d.pending[params.id]
+    if req then
+      req.last = params.data
+      if req.on_event then
+        req.on_event(params.data)
+      end
+    end
+    return
+  end
+  local req = d.pending[msg.id]
+  if not req then
+    return
+  end
+  d.pending[msg.id] = nil
+  if msg.error then
+    req.on_exit({ success = false, error = msg.error.message, code = -1 })
+    return
+  end
+  local code = msg.result and msg.result.code or 0
+  req.on_exit({ success = code == 0, code = code, data = req.last })
+end
+
+---@return ScraperDaemon|nil
+local function get_daemon()
+  if daemon then
+    return daemon
+  end
+
+  local uv = vim.loop
+  local stdin = uv.new_pipe(false)
+  local stdout = uv.new_pipe(false)
+  local stderr = uv.new_pipe(false)
+  local plugin_path = utils.get_plugin_path()
+
+  ---@type ScraperDaemon
+  local d = { next_id = 1, pending = {} } ---@diagnostic disable-line: missing-fields
+  local handle
+  handle = uv.spawn('uv', {
+    args = { 'run', '--directory', plugin_path, '-m', 'scrapers', 'serve' },
+    stdio = { stdin, stdout, stderr },
+    env = scraper_env(),
+  }, function(code, signal)
+    if daemon == d then
+      daemon = nil
+    end
+    for id, req in pairs(d.pending) do
+      d.pending[id] = nil
+      req.on_exit({
+        success = false,
+        code = code,
+        signal = signal,
+        error = 'scraper daemon exited',
+      })
+    end
+    for _, pipe in ipairs({ stdin, stdout, stderr }) do
+      if not pipe:is_closing() then
+        pipe:close()
+      end
+    end
+    if handle and not handle:is_closing() then
+      handle:close()
+    end
+  end)
+
+  if not handle then
+    for _, pipe in ipairs({ stdin, stdout, stderr }) do
+      pipe:close()
+    end
+    return nil
+  end
+  d.handle = handle
+  d.stdin = stdin
+
+  local buf = ''
+  uv.read_start(stdout, function(_, data)
+    if data == nil then
+      return
+    end
+    buf = buf .. data
+    while true do
+      local s, e = buf:find('\n', 1, true)
+      if not s then
+        break
+      end
+      local line = buf:sub(1, s - 1)
+      buf = buf:sub(e + 1)
+      local ok, msg = pcall(vim.json.decode, line)
+      if ok and type(msg) == 'table' then
+        daemon_dispatch(d, msg)
+      end
+    end
+  end)
+  uv.read_start(stderr, function(_, _) end)
+
+  daemon = d
+  return d
+end
+
+---@param platform string
+---@param subcommand string
+---@param args string[]
+---@param req ScraperRequest
+---@return boolean
+local function daemon_request(platform, subcommand, args, req)
+  local d = get_daemon()
+  if not d then
+    return false
+  end
+  local id = d.next_id
+  d.next_id = id + 1
+  d.pending[id] = req
+  local msg = vim.json.encode({
+    jsonrpc = '2.0',
+    id = id,
+    method = subcommand,
+    params = { platform = platform, args = args },
+  })
+  d.stdin:write(msg .. '\n')
+  return true
+end
+
 ---@param platform string
 ---@param subcommand string
 ---@param args string[]
----@param opts { sync?: boolean, ndjson?: boolean, on_event?: fun(ev: table), on_exit?: fun(result: table) }
+---@param opts ScraperOpts
+local function run_scraper_daemon(platform, subcommand, args, opts)
+  local function finish(result)
+    if not result.success and result.data == nil then
+      return {
+        success = false,
+        error = 'Scraper failed: ' .. (result.error or ('exit code ' .. tostring(result.code))),
+      }
+    end
+    return { success = result.code == 0, data = result.data, error = result.error }
+  end
+
+  if opts.ndjson then
+    return daemon_request(platform, subcommand, args, {
+      on_event = opts.on_event,
+      on_exit = function(result)
+        if opts.on_exit then
+          opts.on_exit({
+            success = result.code == 0,
+            code = result.code,
+            signal = result.signal,
+            error = result.error,
+          })
+        end
+      end,
+    })
+  end
+
+  if opts.sync then
+    local done = nil
+    local started = daemon_request(platform, subcommand, args, {
+      on_exit = function(result)
+        done = finish(result)
+      end,
+    })
+    if not started then
+      return false
+    end
+    vim.wait(30000, function()
+      return done ~= nil
+    end, 10)
+    return true, done or { success = false, error = 'Scraper timed out' }
+  end
+
+  return daemon_request(platform, subcommand, args, {
+    on_exit = function(result)
+      if opts.on_exit then
+        opts.on_exit(finish(result))
+      end
+    end,
+  })
+end
+
+---@param platform string
+---@param subcommand string
+---@param args string[]
+---@param opts ScraperOpts
 local function run_scraper(platform, subcommand, args, opts)
+  opts = opts or {}
+  local started, sync_result = run_scraper_daemon(platform, subcommand, args, opts)
+  if started then
+    return sync_result
+  end
+
   local plugin_path = utils.get_plugin_path()
   local cmd = { 'uv', 'run', '--directory', plugin_path, '-m', 'scrapers.' .. platform, subcommand }
   vim.list_extend(cmd, args)
 
-  local env = vim.fn.environ()
-  env.VIRTUAL_ENV = ''
-  env.PYTHONPATH = ''
-  env.CONDA_PREFIX = ''
+  local env = scraper_env()
 
-  if opts and opts.ndjson then
+  if opts.ndjson then
     local uv = vim.loop
     local stdout = uv.new_pipe(false)
     local stderr = uv.new_pipe(false)
@@ -103,49 +316,18 @@ local function run_scraper(platform, subcommand, args, opts)
   end
 
   local sysopts = { text = true, timeout = 30000, env = env }
-  if opts and opts.sync then
+  if opts.sync then
     local result = vim.system(cmd, sysopts):wait()
     return syshandle(result)
   else
     vim.system(cmd, sysopts, function(result)
-      if opts and opts.on_exit then
+      if opts.on_exit then
         return opts.on_exit(syshandle(result))
       end
     end)
   end
 end
 
-function M.scrape_contest_metadata(platform, contest_id, callback)
-  run_scraper(platform, 'metadata', { contest_id }, {
-    on_exit = function(result)
-      if not result or not result.success then
-        logger.log(
-          ("Failed to scrape metadata for %s contest '%s'."):format(
-            constants.PLATFORM_DISPLAY_NAMES[platform],
-            contest_id
-          ),
-          vim.log.levels.ERROR
-        )
-        return
-      end
-      local data = result.data or {}
-      if not data.problems or #data.problems == 0 then
-        logger.log(
-          ("No problems returned for %s contest '%s'."):format(
-            constants.PLATFORM_DISPLAY_NAMES[platform],
-            contest_id
-          ),
-          vim.log.levels.ERROR
-        )
-        return
-      end
-      if type(callback) == 'function' then
-        callback(data)
-      end
-    end,
-  })
-end
-
 function M.scrape_contest_list(platform)
   local result = run_scraper(platform, 'contests', {}, { sync = true })
   if not result or not result.success or not (result.data and result.data.contests) then
@@ -161,54 +343,218 @@ function M.scrape_contest_list(platform)
   return result.data.contests
 end
 
+---Rebuild the combined test that `--no-combined` leaves out of tests events.
+---@param tests TestCase[]
+---@param multi_test boolean
+---@return CombinedTest
+local function rebuild_combined(tests, multi_test)
+  local inputs, expected = {}, {}
+  for i, t in ipairs(tests) do
+    local input = t.input
+    if multi_test and input:sub(1, 2) == '1\n' then
+      input = input:sub(3)
+    end
+    inputs[i] = input
+    expected[i] = t.expected
+  end
+  local input = table.concat(inputs, '\n')
+  if multi_test then
+    input = #tests .. '\n' .. input
+  end
+  return { input = input, expected = table.concat(expected, '\n') }
+end
+
+-- Sample file names the scraper writes, matching `config.default_filename`.
+local IO_NAME_TEMPLATE = '{contest_id!l}{problem_id!l}'
+
+---Read a whole file through libuv, so the editor never waits on the disk.
+---@param path string
+---@param on_read fun(data: string|nil)
+local function read_file_async(path, on_read)
+  local uv = vim.loop
+  uv.fs_open(path, 'r', 438, function(open_err, fd)
+    if open_err or not fd then
+      return on_read(nil)
+    end
+    uv.fs_fstat(fd, function(stat_err, stat)
+      if stat_err or not stat then
+        uv.fs_close(fd, function() end)
+        return on_read(nil)
+      end
+      uv.fs_read(fd, stat.size, 0, function(read_err, data)
+        uv.fs_close(fd, function() end)
+        on_read(not read_err and data or nil)
+      end)
+    end)
+  end)
+end
+
+---Read back the samples a `--write-io` stream wrote. `on_done` runs in a
+---fast event context once every file has been read.
+---@param paths { input_path: string, expected_path: string }[]
+---@param on_done fun(tests: TestCase[])
+local function read_samples(paths, on_done)
+  local tests = {}
+  local pending = #paths * 2
+  if pending == 0 then
+    return on_done(tests)
+  end
+  local function store(i, field)
+    return function(data)
+      -- Same text `readfile()` joined with newlines gives: no CRs, no final newline.
+      tests[i][field] = (data or ''):gsub('\r\n', '\n'):gsub('\n$', '')
+      pending = pending - 1
+      if pending == 0 then
+        on_done(tests)
+      end
+    end
+  end
+  for i, p in ipairs(paths) do
+    tests[i] = { input = '', expected = '' }
+    read_file_async(p.input_path, store(i, 'input'))
+    read_file_async(p.expected_path, store(i, 'expected'))
+  end
+end
+
+---Arguments for a tests stream that writes its samples under `io/`.
+---@param contest_id string
+---@return string[]
+local function tests_args(contest_id)
+  vim.fn.mkdir('build', 'p')
+  return {
+    '--write-io',
+    vim.fn.fnamemodify('io', ':p'),
+    '--name-template',
+    IO_NAME_TEMPLATE,
+    contest_id,
+  }
+end
+
+---@param contest_id string
+---@param callback fun(data: table)|nil
+---@return fun(ev: table)
+local function tests_event_handler(contest_id, callback)
+  return function(ev)
+    if ev.manifest then
+      return
+    end
+    if ev.done then
+      if (ev.failed or 0) > 0 then
+        logger.log(
+          ("Loaded tests for %d of %d problems in contest '%s'."):format(
+            ev.succeeded or 0,
+            ev.problems or 0,
+            contest_id
+          ),
+          vim.log.levels.WARN
+        )
+      end
+      return
+    end
+    if ev.error and (ev.problem_id or '') == '' then
+      logger.log(
+        ("Failed to load tests for contest '%s': %s"):format(contest_id, ev.error),
+        vim.log.levels.ERROR
+      )
+      return
+    end
+    if ev.error and ev.problem_id then
+      logger.log(
+        ("Failed to load tests for problem '%s' in contest '%s': %s"):format(
+          ev.problem_id,
+          contest_id,
+          ev.error
+        ),
+        vim.log.levels.WARN
+      )
+      return
+    end
+    if not ev.problem_id or not ev.tests or type(callback) ~= 'function' then
+      return
+    end
+    -- The scraper has already written the samples; only read them back for the cache.
+    read_samples(ev.tests, function(tests)
+      vim.schedule(function()
+        callback({
+          combined = ev.combined or rebuild_combined(tests, ev.multi_test or false),
+          tests = tests,
+          timeout_ms = ev.timeout_ms or 0,
+          memory_mb = ev.memory_mb or 0,
+          interactive = ev.interactive or false,
+          multi_test = ev.multi_test or false,
+          problem_id = ev.problem_id,
+        })
+      end)
+    end)
+  end
+end
+
 ---@param platform string
 ---@param contest_id string
 ---@param callback fun(data: table)|nil
 function M.scrape_all_tests(platform, contest_id, callback)
-  run_scraper(platform, 'tests', { contest_id }, {
+  run_scraper(platform, 'tests', tests_args(contest_id), {
+    ndjson = true,
+    on_event = tests_event_handler(contest_id, callback),
+  })
+end
+
+---Fetch a contest's metadata and then its tests in one scraper run. The
+---metadata is the first event; the tests stream reuses the pages it fetched.
+---@param platform string
+---@param contest_id string
+---@param on_metadata fun(data: table)
+---@param on_tests fun(data: table)|nil
+function M.prepare_contest(platform, contest_id, on_metadata, on_tests)
+  local on_test_event = tests_event_handler(contest_id, on_tests)
+  local seen_metadata = false
+  -- Set once the run's outcome has reached the user through its events.
+  local settled = false
+  run_scraper(platform, 'prepare', tests_args(contest_id), {
     ndjson = true,
     on_event = function(ev)
-      if ev.done then
-        return
+      if seen_metadata then
+        settled = settled or ev.done == true
+        return on_test_event(ev)
       end
-      if ev.error and ev.problem_id then
+      seen_metadata = true
+      if not ev.success or not ev.problems or #ev.problems == 0 then
         logger.log(
-          ("Failed to load tests for problem '%s' in contest '%s': %s"):format(
-            ev.problem_id,
+          ("Failed to scrape metadata for %s contest '%s'%s"):format(
+            constants.PLATFORM_DISPLAY_NAMES[platform],
             contest_id,
-            ev.error
+            (ev.error and ev.error ~= '') and (': ' .. ev.error) or '.'
           ),
-          vim.log.levels.WARN
+          vim.log.levels.ERROR
         )
+        settled = true
         return
       end
-      if not ev.problem_id or not ev.tests then
+      on_metadata(ev)
+    end,
+    -- A run that dies early (uv, a traceback, a daemon error) has nothing
+    -- in its events to say so.
+    on_exit = function(result)
+      if result.code == 0 or settled then
         return
       end
-      vim.schedule(function()
-        vim.system({ 'mkdir', '-p', 'build', 'io' }):wait()
-        local config = require('cp.config')
-        local base_name = config.default_filename(contest_id, ev.problem_id)
-        for i, t in ipairs(ev.tests) do
-          local input_file = 'io/' .. base_name .. '.' .. i .. '.cpin'
-          local expected_file = 'io/' .. base_name .. '.' .. i .. '.cpout'
-          local input_content = t.input:gsub('\r', '')
-          local expected_content = t.expected:gsub('\r', '')
-          vim.fn.writefile(vim.split(input_content, '\n'), input_file)
-          vim.fn.writefile(vim.split(expected_content, '\n'), expected_file)
-        end
-        if type(callback) == 'function' then
-          callback({
-            combined = ev.combined,
-            tests = ev.tests,
-            timeout_ms = ev.timeout_ms or 0,
-            memory_mb = ev.memory_mb or 0,
-            interactive = ev.interactive or false,
-            multi_test = ev.multi_test or false,
-            problem_id = ev.problem_id,
-          })
-        end
-      end)
+      local reason = (result.error and result.error ~= '') and result.error
+        or ('exit code ' .. tostring(result.code))
+      if not seen_metadata then
+        logger.log(
+          ("Failed to scrape metadata for %s contest '%s': %s"):format(
+            constants.PLATFORM_DISPLAY_NAMES[platform],
+            contest_id,
+            reason
+          ),
+          vim.log.levels.ERROR
+        )
+      else
+        logger.log(
+          ("Failed to load tests for contest '%s': %s"):format(contest_id, reason),
+          vim.log.levels.ERROR
+        )
+      end
     end,
   })
 end
@@ -59,9 +59,14 @@ end
 ---@field memory_mb integer|nil
 ---@field interactive boolean|nil
 ---@field error string|nil
+---@field manifest boolean|nil
+---@field problem_ids string[]|nil
 ---@field done boolean|nil
+---@field problems integer|nil
 ---@field succeeded integer|nil
 ---@field failed integer|nil
+---@field elapsed_ms number|nil
+---@field first_problem_ms number|nil
 
 ---@param cd table|nil
 ---@return boolean
@@ -74,6 +79,41 @@ local function is_metadata_ready(cd)
     or false
 end
 
+---@param platform string
+---@param contest_id string
+---@return fun(ev: table)
+local function cache_tests(platform, contest_id)
+  return function(ev)
+    local cached_tests = {}
+    if not ev.interactive and vim.tbl_isempty(ev.tests) then
+      logger.log(("No tests found for problem '%s'."):format(ev.problem_id), vim.log.levels.WARN)
+    end
+    for i, t in ipairs(ev.tests) do
+      cached_tests[i] = { index = i, input = t.input, expected = t.expected }
+    end
+    cache.set_test_cases(
+      platform,
+      contest_id,
+      ev.problem_id,
+      ev.combined,
+      cached_tests,
+      ev.timeout_ms or 0,
+      ev.memory_mb or 0,
+      ev.interactive,
+      ev.multi_test
+    )
+
+    local io_state = state.get_io_view_state()
+    if io_state then
+      local combined_test = cache.get_combined_test(platform, contest_id, state.get_problem_id())
+      if combined_test then
+        local input_lines = vim.split(combined_test.input, '\n')
+        require('cp.utils').update_buffer_content(io_state.input_buf, input_lines, nil, nil)
+      end
+    end
+  end
+end
+
 ---@param platform string
 ---@param contest_id string
 ---@param problems table
@@ -83,35 +123,7 @@ local function start_tests(platform, contest_id, problems)
   end, problems)
   if cached_len ~= #problems then
     logger.log(('Fetching %s/%s problem tests...'):format(cached_len, #problems))
-    scraper.scrape_all_tests(platform, contest_id, function(ev)
-      local cached_tests = {}
-      if not ev.interactive and vim.tbl_isempty(ev.tests) then
-        logger.log(("No tests found for problem '%s'."):format(ev.problem_id), vim.log.levels.WARN)
-      end
-      for i, t in ipairs(ev.tests) do
-        cached_tests[i] = { index = i, input = t.input, expected = t.expected }
-      end
-      cache.set_test_cases(
-        platform,
-        contest_id,
-        ev.problem_id,
-        ev.combined,
-        cached_tests,
-        ev.timeout_ms or 0,
-        ev.memory_mb or 0,
-        ev.interactive,
-        ev.multi_test
-      )
-
-      local io_state = state.get_io_view_state()
-      if io_state then
-        local combined_test = cache.get_combined_test(platform, contest_id, state.get_problem_id())
-        if combined_test then
-          local input_lines = vim.split(combined_test.input, '\n')
-          require('cp.utils').update_buffer_content(io_state.input_buf, input_lines, nil, nil)
-        end
-      end
-    end)
+    scraper.scrape_all_tests(platform, contest_id, cache_tests(platform, contest_id))
   end
 end
 
@@ -137,11 +149,14 @@ function M.setup_contest(platform, contest_id, problem_id, language)
 
   cache.load()
 
-  local function proceed(contest_data)
+  ---@param tests_started? boolean the tests are already streaming in
+  local function proceed(contest_data, tests_started)
     local problems = contest_data.problems
     local pid = problem_id and problem_id or problems[1].id
     M.setup_problem(pid, language)
-    start_tests(platform, contest_id, problems)
+    if not tests_started then
+      start_tests(platform, contest_id, problems)
+    end
 
     if config_module.get_config().open_url and is_new_contest and contest_data.url then
       vim.ui.open(contest_data.url:format(pid))
@@ -177,7 +192,7 @@ function M.setup_contest(platform, contest_id, problem_id, language)
     })
 
     logger.log('Fetching contests problems...', vim.log.levels.INFO, true)
-    scraper.scrape_contest_metadata(
+    scraper.prepare_contest(
       platform,
       contest_id,
       vim.schedule_wrap(function(result)
@@ -198,8 +213,9 @@ function M.setup_contest(platform, contest_id, problem_id, language)
         if not pid then
           return
         end
-        proceed(cd)
-      end)
+        proceed(cd, true)
+      end),
+      cache_tests(platform, contest_id)
     )
     return
   end
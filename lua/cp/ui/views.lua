@@ -120,12 +120,17 @@ function M.toggle_interactive(interactor_cmd)
       end
       local orchestrator =
         vim.fn.fnamemodify(utils.get_plugin_path() .. '/scripts/interact.py', ':p')
+      local timeout_ms, memory_mb = cache.get_constraints(platform, contest_id, problem_id)
       cmdline = table.concat({
         'uv',
         'run',
         vim.fn.shellescape(orchestrator),
         vim.fn.shellescape(interactor),
         vim.fn.shellescape(binary),
+        '--timeout-ms',
+        tostring(timeout_ms or 0),
+        '--memory-mb',
+        tostring(memory_mb or 0),
       }, ' ')
     else
       cmdline = vim.fn.shellescape(binary)
@@ -0,0 +1,32 @@
+import importlib
+import sys
+
+from .daemon import SCRAPERS
+
+
+def _usage() -> str:
+    platforms = " | ".join(SCRAPERS)
+    return f"Usage: python -m scrapers serve | {{{platforms}}} <mode> [args...]"
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print(_usage(), file=sys.stderr)
+        sys.exit(1)
+
+    command = sys.argv[1]
+    if command == "serve":
+        from .daemon import main as serve
+
+        serve()
+    elif command in SCRAPERS:
+        module_name, class_name = SCRAPERS[command]
+        module = importlib.import_module(module_name)
+        getattr(module, class_name)().run_cli(sys.argv[1:])
+    else:
+        print(_usage(), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
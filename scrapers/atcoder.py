@@ -1,105 +1,78 @@
 #!/usr/bin/env python3
 
 import asyncio
-import json
 import re
-import sys
 import time
-from typing import Any
-
-import backoff
-import httpx
-import requests
-from bs4 import BeautifulSoup, Tag
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
 
 from .base import BaseScraper
+from .cache import (
+    TTL_IMMUTABLE,
+    TTL_VOLATILE,
+    Ttl,
+    fetch_cached_async,
+    load_state,
+    save_state,
+)
+from .fetch import get_with_retry
 from .models import (
-    CombinedTest,
     ContestListResult,
     ContestSummary,
     MetadataResult,
     ProblemSummary,
+    ScraperConfig,
     TestCase,
-    TestsResult,
 )
+from .soup import make_soup
+
+if TYPE_CHECKING:
+    import httpx
+    from bs4 import BeautifulSoup, Tag
 
 MIB_TO_MB = 1.048576
 BASE_URL = "https://atcoder.jp"
 ARCHIVE_URL = f"{BASE_URL}/contests/archive"
-TIMEOUT_SECONDS = 30
+CONFIG = ScraperConfig(
+    timeout_seconds=30,
+    max_retries=4,
+    backoff_base=0.5,
+    rate_limit_delay=0.1,
+    burst=20,
+    concurrency=8,
+    max_concurrency=32,
+)
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
 }
-RETRY_STATUS = {429, 502, 503, 504}
-FATAL_STATUS = {400, 401, 403, 404, 410}
-
-_session = requests.Session()
-_adapter = HTTPAdapter(
-    pool_connections=100,
-    pool_maxsize=100,
-    max_retries=Retry(total=0),
-)
-_session.mount("https://", _adapter)
-_session.mount("http://", _adapter)
-
+ARCHIVE_STATE = "atcoder_archive"
+# Every contest page sets the end time for its countdown in an inline script.
+END_TIME_RE = re.compile(r"var endTime = moment\('([^']+)'\)")
+# Rebuild the archive from scratch now and then to pick up renamed rounds.
+ARCHIVE_FULL_REFRESH_S = 30 * 24 * 60 * 60
 
-def _give_up_requests(exc: Exception) -> bool:
-    if isinstance(exc, requests.HTTPError) and exc.response is not None:
-        return exc.response.status_code in FATAL_STATUS
-    return False
 
-
-def _retry_after_requests(details):
-    exc = details.get("exception")
-    if isinstance(exc, requests.HTTPError) and exc.response is not None:
-        ra = exc.response.headers.get("Retry-After")
-        if ra:
-            try:
-                time.sleep(max(0.0, float(ra)))
-            except ValueError:
-                pass
-
-
-@backoff.on_exception(
-    backoff.expo,
-    (requests.ConnectionError, requests.Timeout, requests.HTTPError),
-    max_tries=5,
-    jitter=backoff.full_jitter,
-    giveup=_give_up_requests,
-    on_backoff=_retry_after_requests,
-)
-def _fetch(url: str) -> str:
-    r = _session.get(url, headers=HEADERS, timeout=TIMEOUT_SECONDS)
-    if r.status_code in RETRY_STATUS:
-        raise requests.HTTPError(response=r)
-    r.raise_for_status()
-    return r.text
-
-
-def _giveup_httpx(exc: Exception) -> bool:
-    return (
-        isinstance(exc, httpx.HTTPStatusError)
-        and exc.response is not None
-        and (exc.response.status_code in FATAL_STATUS)
+def _contest_page_ttl(html: str) -> float:
+    """Cache task pages for good only once the contest is over."""
+    m = END_TIME_RE.search(html)
+    try:
+        end = datetime.fromisoformat(m.group(1)).timestamp() if m else None
+    except ValueError:
+        end = None
+    return TTL_IMMUTABLE if end is not None and end < time.time() else 0
+
+
+async def _get_async(
+    client: "httpx.AsyncClient", url: str, ttl: Ttl = _contest_page_ttl
+) -> str:
+    return await fetch_cached_async(
+        url,
+        lambda extra: get_with_retry(client, url, CONFIG, {**HEADERS, **extra}),
+        ttl,
     )
 
 
-@backoff.on_exception(
-    backoff.expo,
-    (httpx.ConnectError, httpx.ReadTimeout, httpx.HTTPStatusError),
-    max_tries=5,
-    jitter=backoff.full_jitter,
-    giveup=_giveup_httpx,
-)
-async def _get_async(client: httpx.AsyncClient, url: str) -> str:
-    r = await client.get(url, headers=HEADERS, timeout=TIMEOUT_SECONDS)
-    r.raise_for_status()
-    return r.text
-
-
-def _text_from_pre(pre: Tag) -> str:
+def _text_from_pre(pre: "Tag") -> str:
     return (
         pre.get_text(separator="\n", strip=False)
         .replace("\r", "")
@@ -108,8 +81,7 @@ def _text_from_pre(pre: Tag) -> str:
     )
 
 
-def _parse_last_page(html: str) -> int:
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_last_page(soup: "BeautifulSoup") -> int:
     nav = soup.select_one("ul.pagination")
     if not nav:
         return 1
@@ -121,8 +93,7 @@ def _parse_last_page(html: str) -> int:
     return max(nums) if nums else 1
 
 
-def _parse_archive_contests(html: str) -> list[ContestSummary]:
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_archive_contests(soup: "BeautifulSoup") -> list[ContestSummary]:
     tbody = soup.select_one("table.table-default tbody") or soup.select_one("tbody")
     if not tbody:
         return []
@@ -143,8 +114,13 @@ def _parse_archive_contests(html: str) -> list[ContestSummary]:
     return out
 
 
+def _parse_archive_page(html: str) -> tuple[int, list[ContestSummary]]:
+    soup = make_soup(html)
+    return _parse_last_page(soup), _parse_archive_contests(soup)
+
+
 def _parse_tasks_list(html: str) -> list[dict[str, str]]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = make_soup(html)
     tbody = soup.select_one("table tbody")
     if not tbody:
         return []
@@ -169,8 +145,7 @@ def _parse_tasks_list(html: str) -> list[dict[str, str]]:
     return rows
 
 
-def _extract_problem_info(html: str) -> tuple[int, float, bool]:
-    soup = BeautifulSoup(html, "html.parser")
+def _extract_problem_info(soup: "BeautifulSoup") -> tuple[int, float, bool]:
     txt = soup.get_text(" ", strip=True)
     timeout_ms = 0
     memory_mb = 0.0
@@ -181,13 +156,13 @@ def _extract_problem_info(html: str) -> tuple[int, float, bool]:
     if ms:
         memory_mb = float(ms.group(1)) * MIB_TO_MB
     div = soup.select_one("#problem-statement")
-    txt = div.get_text(" ", strip=True) if div else soup.get_text(" ", strip=True)
+    if div:
+        txt = div.get_text(" ", strip=True)
     interactive = "This is an interactive" in txt
     return timeout_ms, memory_mb, interactive
 
 
-def _extract_samples(html: str) -> list[TestCase]:
-    soup = BeautifulSoup(html, "html.parser")
+def _extract_samples(soup: "BeautifulSoup") -> list[TestCase]:
     root = soup.select_one("#task-statement") or soup
     inputs: dict[str, str] = {}
     outputs: dict[str, str] = {}
@@ -209,18 +184,29 @@ def _extract_samples(html: str) -> list[TestCase]:
     return cases
 
 
-def _scrape_tasks_sync(contest_id: str) -> list[dict[str, str]]:
-    html = _fetch(f"{BASE_URL}/contests/{contest_id}/tasks")
+async def _scrape_tasks(
+    client: "httpx.AsyncClient", contest_id: str
+) -> list[dict[str, str]]:
+    html = await _get_async(client, f"{BASE_URL}/contests/{contest_id}/tasks")
     return _parse_tasks_list(html)
 
 
-def _scrape_problem_page_sync(contest_id: str, slug: str) -> dict[str, Any]:
-    html = _fetch(f"{BASE_URL}/contests/{contest_id}/tasks/{slug}")
+async def _scrape_problem_page(
+    client: "httpx.AsyncClient", contest_id: str, slug: str
+) -> dict[str, Any]:
+    html = await _get_async(client, f"{BASE_URL}/contests/{contest_id}/tasks/{slug}")
+    # A statement page takes 20-30 ms to parse; off the loop, the other
+    # tasks' fetches keep moving meanwhile.
+    return await asyncio.to_thread(_parse_problem_page, html)
+
+
+def _parse_problem_page(html: str) -> dict[str, Any]:
+    soup = make_soup(html)
     try:
-        tests = _extract_samples(html)
+        tests = _extract_samples(soup)
     except Exception:
         tests = []
-    timeout_ms, memory_mb, interactive = _extract_problem_info(html)
+    timeout_ms, memory_mb, interactive = _extract_problem_info(soup)
     return {
         "tests": tests,
         "timeout_ms": timeout_ms,
@@ -241,33 +227,86 @@ def _to_problem_summaries(rows: list[dict[str, str]]) -> list[ProblemSummary]:
     return out
 
 
-async def _fetch_all_contests_async() -> list[ContestSummary]:
-    async with httpx.AsyncClient(
-        limits=httpx.Limits(max_connections=100, max_keepalive_connections=100),
-    ) as client:
-        first_html = await _get_async(client, ARCHIVE_URL)
-        last = _parse_last_page(first_html)
-        out = _parse_archive_contests(first_html)
-        if last <= 1:
-            return out
-        tasks = [
-            asyncio.create_task(_get_async(client, f"{ARCHIVE_URL}?page={p}"))
-            for p in range(2, last + 1)
-        ]
-        for coro in asyncio.as_completed(tasks):
-            html = await coro
-            out.extend(_parse_archive_contests(html))
+async def _fetch_archive_page(
+    client: "httpx.AsyncClient", page: int
+) -> tuple[int, list[ContestSummary]]:
+    url = ARCHIVE_URL if page == 1 else f"{ARCHIVE_URL}?page={page}"
+    html = await _get_async(client, url, ttl=TTL_VOLATILE)
+    return _parse_archive_page(html)
+
+
+async def _fetch_all_contests_async(
+    client: "httpx.AsyncClient",
+) -> list[ContestSummary]:
+    last, out = await _fetch_archive_page(client, 1)
+    if last <= 1:
         return out
+    pages = await asyncio.gather(
+        *(_fetch_archive_page(client, p) for p in range(2, last + 1))
+    )
+    for _, contests in pages:
+        out.extend(contests)
+    return out
+
+
+async def _refresh_contests_async(
+    client: "httpx.AsyncClient", known: list[ContestSummary]
+) -> list[ContestSummary]:
+    """Walk the newest-first archive only until a known contest shows up."""
+    known_ids = {c.id for c in known}
+    fresh: list[ContestSummary] = []
+    page = last = 1
+    while page <= last:
+        page_last, contests = await _fetch_archive_page(client, page)
+        if page == 1:
+            last = page_last
+        fresh.extend(contests)
+        if any(c.id in known_ids for c in contests):
+            break
+        page += 1
+    fresh_ids = {c.id for c in fresh}
+    return fresh + [c for c in known if c.id not in fresh_ids]
+
+
+def _load_known_contests() -> tuple[list[ContestSummary], float]:
+    state = load_state(ARCHIVE_STATE)
+    if not isinstance(state, dict):
+        return [], 0.0
+    full_at = float(state.get("full_at", 0))
+    if time.time() - full_at > ARCHIVE_FULL_REFRESH_S:
+        return [], 0.0
+    try:
+        contests = [ContestSummary.model_validate(c) for c in state["contests"]]
+    except (KeyError, TypeError, ValueError):
+        return [], 0.0
+    return contests, full_at
+
+
+async def _list_contests_async(client: "httpx.AsyncClient") -> list[ContestSummary]:
+    known, full_at = _load_known_contests()
+    if known:
+        contests = await _refresh_contests_async(client, known)
+    else:
+        contests = await _fetch_all_contests_async(client)
+        full_at = time.time()
+    if contests:
+        save_state(
+            ARCHIVE_STATE,
+            {"full_at": full_at, "contests": [c.model_dump() for c in contests]},
+        )
+    return contests
 
 
 class AtcoderScraper(BaseScraper):
+    max_connections = CONFIG.max_concurrency
+
     @property
     def platform_name(self) -> str:
         return "atcoder"
 
     async def scrape_contest_metadata(self, contest_id: str) -> MetadataResult:
         try:
-            rows = await asyncio.to_thread(_scrape_tasks_sync, contest_id)
+            rows = await _scrape_tasks(self._http_client(), contest_id)
             problems = _to_problem_summaries(rows)
             if not problems:
                 return self._metadata_error(
@@ -285,7 +324,7 @@ class AtcoderScraper(BaseScraper):
 
     async def scrape_contest_list(self) -> ContestListResult:
         try:
-            contests = await _fetch_all_contests_async()
+            contests = await _list_contests_async(self._http_client())
             if not contests:
                 return self._contests_error("No contests found")
             return ContestListResult(success=True, error="", contests=contests)
@@ -293,107 +332,35 @@ class AtcoderScraper(BaseScraper):
             return self._contests_error(str(e))
 
     async def stream_tests_for_category_async(self, category_id: str) -> None:
-        rows = await asyncio.to_thread(_scrape_tasks_sync, category_id)
+        client = self._http_client()
+        rows = [
+            r
+            for r in await _scrape_tasks(client, category_id)
+            if (r.get("letter") or "").strip() and r.get("slug")
+        ]
+        if not rows:
+            raise ValueError(f"No problems found for contest {category_id}")
+        self._emit_manifest([r["letter"].strip().lower() for r in rows])
 
         async def emit(row: dict[str, str]) -> None:
-            letter = (row.get("letter") or "").strip().lower()
-            slug = row.get("slug") or ""
-            if not letter or not slug:
+            letter = row["letter"].strip().lower()
+            try:
+                data = await _scrape_problem_page(client, category_id, row["slug"])
+            except Exception as e:
+                self._emit_problem_error(letter, str(e))
                 return
-            data = await asyncio.to_thread(_scrape_problem_page_sync, category_id, slug)
-            tests: list[TestCase] = data.get("tests", [])
-            combined_input = "\n".join(t.input for t in tests) if tests else ""
-            combined_expected = "\n".join(t.expected for t in tests) if tests else ""
-            print(
-                json.dumps(
-                    {
-                        "problem_id": letter,
-                        "combined": {
-                            "input": combined_input,
-                            "expected": combined_expected,
-                        },
-                        "tests": [
-                            {"input": t.input, "expected": t.expected} for t in tests
-                        ],
-                        "timeout_ms": data.get("timeout_ms", 0),
-                        "memory_mb": data.get("memory_mb", 0),
-                        "interactive": bool(data.get("interactive")),
-                        "multi_test": False,
-                    }
-                ),
-                flush=True,
+            self._emit_problem(
+                self._tests_payload(
+                    letter,
+                    data.get("tests", []),
+                    timeout_ms=data.get("timeout_ms", 0),
+                    memory_mb=data.get("memory_mb", 0),
+                    interactive=bool(data.get("interactive")),
+                )
             )
 
         await asyncio.gather(*(emit(r) for r in rows))
 
 
-async def main_async() -> int:
-    if len(sys.argv) < 2:
-        result = MetadataResult(
-            success=False,
-            error="Usage: atcoder.py metadata <contest_id> OR atcoder.py tests <contest_id> OR atcoder.py contests",
-            url="",
-        )
-        print(result.model_dump_json())
-        return 1
-
-    mode: str = sys.argv[1]
-    scraper = AtcoderScraper()
-
-    if mode == "metadata":
-        if len(sys.argv) != 3:
-            result = MetadataResult(
-                success=False,
-                error="Usage: atcoder.py metadata <contest_id>",
-                url="",
-            )
-            print(result.model_dump_json())
-            return 1
-        contest_id = sys.argv[2]
-        result = await scraper.scrape_contest_metadata(contest_id)
-        print(result.model_dump_json())
-        return 0 if result.success else 1
-
-    if mode == "tests":
-        if len(sys.argv) != 3:
-            tests_result = TestsResult(
-                success=False,
-                error="Usage: atcoder.py tests <contest_id>",
-                problem_id="",
-                combined=CombinedTest(input="", expected=""),
-                tests=[],
-                timeout_ms=0,
-                memory_mb=0,
-            )
-            print(tests_result.model_dump_json())
-            return 1
-        contest_id = sys.argv[2]
-        await scraper.stream_tests_for_category_async(contest_id)
-        return 0
-
-    if mode == "contests":
-        if len(sys.argv) != 2:
-            contest_result = ContestListResult(
-                success=False, error="Usage: atcoder.py contests"
-            )
-            print(contest_result.model_dump_json())
-            return 1
-        contest_result = await scraper.scrape_contest_list()
-        print(contest_result.model_dump_json())
-        return 0 if contest_result.success else 1
-
-    result = MetadataResult(
-        success=False,
-        error="Unknown mode. Use 'metadata <contest_id>', 'tests <contest_id>', or 'contests'",
-        url="",
-    )
-    print(result.model_dump_json())
-    return 1
-
-
-def main() -> None:
-    sys.exit(asyncio.run(main_async()))
-
-
 if __name__ == "__main__":
-    main()
+    AtcoderScraper().run_cli()
@@ -1,11 +1,116 @@
 import asyncio
 import sys
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any
 
-from .models import CombinedTest, ContestListResult, MetadataResult, TestsResult
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from . import flight, iofiles, trace
+from .cache import shared_fetches
+from .models import (
+    CombinedTest,
+    ContestListResult,
+    MetadataResult,
+    TestCase,
+    TestsResult,
+)
+
+if TYPE_CHECKING:
+    import httpx
+
+# Where emitted NDJSON lines go, as encoded JSON without the newline. Unset
+# means stdout; the daemon swaps in a per-request sink so concurrent requests
+# do not interleave on one stream.
+output_sink: ContextVar[Callable[[bytes], None] | None] = ContextVar(
+    "output_sink", default=None
+)
+
+# Contest a batch invocation is working on; every line emitted while it is
+# set carries it as ``contest_id`` so interleaved output can be told apart.
+current_contest: ContextVar[str | None] = ContextVar("current_contest", default=None)
+
+# ``--no-combined`` leaves ``combined`` out of problem events whenever the
+# consumer can rebuild it from ``tests``: the inputs and the expected outputs
+# each joined with newlines, or for ``multi_test`` problems the inputs with
+# their ``1\n`` prefix dropped, joined, and headed by the test count.
+NO_COMBINED_FLAG = "--no-combined"
+omit_combined: ContextVar[bool] = ContextVar("omit_combined", default=False)
+
+# ``--write-io`` makes problem events carry sample file paths instead of the
+# samples; the writer is bound to a contest by ``_tests_one``.
+io_writer: ContextVar[iofiles.IOWriter | None] = ContextVar("io_writer", default=None)
+
+
+@dataclass
+class StreamStats:
+    """Progress of one tests stream, reported by its closing ``done`` event."""
+
+    start: float = field(default_factory=time.perf_counter)
+    problems: int | None = None
+    succeeded: int = 0
+    failed: int = 0
+    first_ms: float | None = None
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.start) * 1000, 3)
+
+
+# The tests stream being produced in this task; set by ``_tests_one``.
+current_stream: ContextVar[StreamStats | None] = ContextVar(
+    "current_stream", default=None
+)
+
+
+def write_stdout(data: bytes) -> None:
+    """Write encoded lines to stdout in one call, bypassing the text layer."""
+    out = getattr(sys.stdout, "buffer", None)
+    if out is None:
+        # stdout was swapped for a text stream, as under test capture.
+        sys.stdout.write(data.decode())
+        sys.stdout.flush()
+        return
+    out.write(data)
+    out.flush()
+
+
+def _tag_contest(
+    payload: BaseModel | dict[str, Any], contest_id: str
+) -> tuple[BaseModel | dict[str, Any], bool]:
+    """Fill in ``contest_id``; True when it must be spliced into the JSON."""
+    if isinstance(payload, dict):
+        if not payload.get("contest_id"):
+            payload = {"contest_id": contest_id, **payload}
+        return payload, False
+    if "contest_id" in type(payload).model_fields:
+        if not payload.contest_id:
+            payload = payload.model_copy(update={"contest_id": contest_id})
+        return payload, False
+    return payload, True
+
+
+def _derived_combined(tests: list[TestCase], multi_test: bool) -> CombinedTest:
+    """The combined test a consumer rebuilds when ``combined`` is omitted."""
+    inputs = [t.input for t in tests]
+    if multi_test:
+        inputs = [f"{len(tests)}\n" + "\n".join(i.removeprefix("1\n") for i in inputs)]
+    return CombinedTest.model_construct(
+        input="\n".join(inputs), expected="\n".join(t.expected for t in tests)
+    )
 
 
 class BaseScraper(ABC):
+    max_connections: int = 100
+    # Contests fetched at once by a batch invocation.
+    batch_concurrency: int = 4
+
+    def __init__(self) -> None:
+        self._client: "httpx.AsyncClient | None" = None
+
     @property
     @abstractmethod
     def platform_name(self) -> str: ...
@@ -19,9 +124,130 @@ class BaseScraper(ABC):
     @abstractmethod
     async def stream_tests_for_category_async(self, category_id: str) -> None: ...
 
+    def _http_client(self) -> "httpx.AsyncClient":
+        import httpx
+
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                )
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _emit(self, payload: BaseModel | dict[str, Any]) -> None:
+        # Models and dicts (including models nested in dicts) are encoded
+        # straight to bytes by pydantic-core, without an intermediate dict.
+        contest_id = current_contest.get()
+        prepend = False
+        if contest_id is not None:
+            payload, prepend = _tag_contest(payload, contest_id)
+        line = to_json(payload)
+        if prepend and len(line) > 2:
+            line = b'{"contest_id":' + to_json(contest_id) + b"," + line[1:]
+        if flight.record(line):
+            self._write_line(line)
+
+    def _write_line(self, line: bytes) -> None:
+        sink = output_sink.get()
+        if sink is None:
+            write_stdout(line + b"\n")
+        else:
+            sink(line)
+
+    def _tests_payload(
+        self,
+        problem_id: str,
+        tests: list[TestCase],
+        timeout_ms: int,
+        memory_mb: float,
+        interactive: bool = False,
+        multi_test: bool = False,
+        combined: CombinedTest | None = None,
+    ) -> dict[str, Any]:
+        """A problem event holding the parsed samples as they are.
+
+        The ``TestCase`` models are serialised in place by ``_emit``, so the
+        samples are never copied into intermediate dicts.
+        """
+        payload: dict[str, Any] = {"problem_id": problem_id}
+        if omit_combined.get() or io_writer.get() is not None:
+            if combined is not None and combined != _derived_combined(
+                tests, multi_test
+            ):
+                payload["combined"] = combined
+        else:
+            payload["combined"] = combined or _derived_combined(tests, multi_test)
+        payload.update(
+            tests=tests,
+            timeout_ms=timeout_ms,
+            memory_mb=memory_mb,
+            interactive=interactive,
+            multi_test=multi_test,
+        )
+        return payload
+
+    def _emit_manifest(self, problem_ids: list[str]) -> None:
+        """Announce the problems a tests stream is about to produce."""
+        stats = current_stream.get()
+        if stats is not None:
+            stats.problems = len(problem_ids)
+        self._emit(
+            {"manifest": True, "count": len(problem_ids), "problem_ids": problem_ids}
+        )
+
+    def _emit_problem(self, payload: BaseModel | dict[str, Any]) -> bool:
+        """Emit one problem's event; False if its samples could not be written."""
+        writer = io_writer.get()
+        if writer is not None and isinstance(payload, dict):
+            pid = payload["problem_id"]
+            try:
+                paths = writer.write(pid, payload["tests"])
+            except (OSError, ValueError) as e:
+                self._emit_problem_error(pid, f"Failed to write samples: {e}")
+                return False
+            payload = {**payload, "tests": paths}
+        stats = current_stream.get()
+        if stats is not None:
+            stats.succeeded += 1
+            if stats.first_ms is None:
+                stats.first_ms = stats.elapsed_ms()
+        self._emit(payload)
+        return True
+
+    def _emit_problem_error(self, problem_id: str, error: str) -> None:
+        stats = current_stream.get()
+        if stats is not None:
+            stats.failed += 1
+        self._emit({"problem_id": problem_id, "error": error})
+
+    def _emit_done(self, stats: StreamStats) -> None:
+        self._emit(
+            {
+                "done": True,
+                "problems": stats.problems,
+                "succeeded": stats.succeeded,
+                "failed": stats.failed,
+                "elapsed_ms": stats.elapsed_ms(),
+                "first_problem_ms": stats.first_ms,
+            }
+        )
+
     def _usage(self) -> str:
         name = self.platform_name
-        return f"Usage: {name}.py metadata <id> | tests <id> | contests"
+        return (
+            f"Usage: {name}.py [--trace[=FILE]] metadata <id>... "
+            f"| tests [{NO_COMBINED_FLAG}] [{iofiles.WRITE_IO_FLAG} DIR "
+            f"[{iofiles.NAME_TEMPLATE_FLAG} TEMPLATE]] <id>... "
+            "| prepare [tests options] <id>... "
+            "| contests (use - to read ids from stdin)"
+        )
 
     def _metadata_error(self, msg: str) -> MetadataResult:
         return MetadataResult(success=False, error=msg, url="")
@@ -40,44 +266,137 @@ class BaseScraper(ABC):
     def _contests_error(self, msg: str) -> ContestListResult:
         return ContestListResult(success=False, error=msg)
 
+    def _contest_ids(self, args: list[str]) -> list[str]:
+        if args == ["-"]:
+            return sys.stdin.read().split()
+        return args
+
+    async def _run_batch(
+        self, contest_ids: list[str], run_one: Callable[[str], Awaitable[bool]]
+    ) -> int:
+        sem = asyncio.Semaphore(self.batch_concurrency)
+
+        async def one(contest_id: str) -> bool:
+            async with sem:
+                current_contest.set(contest_id)
+                return await run_one(contest_id)
+
+        results = await asyncio.gather(*(one(c) for c in dict.fromkeys(contest_ids)))
+        return 0 if all(results) else 1
+
+    async def _metadata_one(self, contest_id: str) -> bool:
+        result = await self.scrape_contest_metadata(contest_id)
+        self._emit(result)
+        return result.success
+
+    async def _tests_one(self, contest_id: str) -> bool:
+        """Stream one contest's tests, closing with a ``done`` event."""
+        stats = StreamStats()
+        current_stream.set(stats)
+        writer = io_writer.get()
+        if writer is not None:
+            io_writer.set(replace(writer, contest_id=contest_id))
+        try:
+            await self.stream_tests_for_category_async(contest_id)
+        except Exception as e:
+            self._emit(self._tests_error(f"Failed to fetch {contest_id}: {e}"))
+            ok = False
+        else:
+            ok = True
+        finally:
+            current_stream.set(None)
+        # A cancelled stream has no ``done``: whoever replays it is about to
+        # see the rest from a fresh run.
+        self._emit_done(stats)
+        return ok
+
+    async def _prepare_one(self, contest_id: str) -> bool:
+        """Emit a contest's metadata, then stream its tests off the same pages."""
+        with shared_fetches() as shared:
+            result = await self.scrape_contest_metadata(contest_id)
+            self._emit(result)
+            if not result.success:
+                return False
+            shared.freeze()
+            return await self._tests_one(contest_id)
+
     async def _run_cli_async(self, args: list[str]) -> int:
+        if len(args) < 2 or "-" in args[2:]:
+            return await self._run_mode(args)
+        # Identical requests running at the same time share one scrape.
+        return await flight.single_flight(
+            self.platform_name, args[1:], lambda: self._run_mode(args), self._write_line
+        )
+
+    async def _run_mode(self, args: list[str]) -> int:
+        if NO_COMBINED_FLAG in args:
+            args = [a for a in args if a != NO_COMBINED_FLAG]
+            omit_combined.set(True)
+        args, writer = iofiles.pop_flags(args)
+        if writer is not None:
+            io_writer.set(writer)
+
         if len(args) < 2:
-            print(self._metadata_error(self._usage()).model_dump_json())
+            self._emit(self._metadata_error(self._usage()))
             return 1
 
         mode = args[1]
 
         match mode:
             case "metadata":
-                if len(args) != 3:
-                    print(self._metadata_error(self._usage()).model_dump_json())
+                if len(args) < 3:
+                    self._emit(self._metadata_error(self._usage()))
                     return 1
-                result = await self.scrape_contest_metadata(args[2])
-                print(result.model_dump_json())
-                return 0 if result.success else 1
+                if len(args) == 3 and args[2] != "-":
+                    result = await self.scrape_contest_metadata(args[2])
+                    self._emit(result)
+                    return 0 if result.success else 1
+                ids = self._contest_ids(args[2:])
+                return await self._run_batch(ids, self._metadata_one)
 
             case "tests":
-                if len(args) != 3:
-                    print(self._tests_error(self._usage()).model_dump_json())
+                if len(args) < 3:
+                    self._emit(self._tests_error(self._usage()))
                     return 1
-                await self.stream_tests_for_category_async(args[2])
-                return 0
+                if len(args) == 3 and args[2] != "-":
+                    return 0 if await self._tests_one(args[2]) else 1
+                ids = self._contest_ids(args[2:])
+                return await self._run_batch(ids, self._tests_one)
+
+            case "prepare":
+                if len(args) < 3:
+                    self._emit(self._metadata_error(self._usage()))
+                    return 1
+                ids = self._contest_ids(args[2:])
+                if len(ids) == 1 and args[2] != "-":
+                    return 0 if await self._prepare_one(ids[0]) else 1
+                return await self._run_batch(ids, self._prepare_one)
 
             case "contests":
                 if len(args) != 2:
-                    print(self._contests_error(self._usage()).model_dump_json())
+                    self._emit(self._contests_error(self._usage()))
                     return 1
                 result = await self.scrape_contest_list()
-                print(result.model_dump_json())
+                self._emit(result)
                 return 0 if result.success else 1
 
             case _:
-                print(
-                    self._metadata_error(
-                        f"Unknown mode: {mode}. {self._usage()}"
-                    ).model_dump_json()
+                self._emit(
+                    self._metadata_error(f"Unknown mode: {mode}. {self._usage()}")
                 )
                 return 1
 
-    def run_cli(self) -> None:
-        sys.exit(asyncio.run(self._run_cli_async(sys.argv)))
+    async def _main_async(self, args: list[str]) -> int:
+        try:
+            return await self._run_cli_async(args)
+        finally:
+            await self.aclose()
+
+    def run_cli(self, args: list[str] | None = None) -> None:
+        args, trace_to = trace.pop_flag(sys.argv if args is None else args)
+        trace.start(trace_to)
+        try:
+            code = asyncio.run(self._main_async(args))
+        finally:
+            trace.stop()
+        sys.exit(code)
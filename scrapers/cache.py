@@ -0,0 +1,358 @@
+"""On-disk HTTP response cache shared by all scrapers.
+
+Bodies are stored in a SQLite database together with their ``ETag`` and
+``Last-Modified`` validators. A fresh entry is served without touching the
+network; a stale one is revalidated with ``If-None-Match`` /
+``If-Modified-Since`` and refreshed in place on ``304 Not Modified``. The
+database is bounded in size and evicts least-recently-used entries first.
+
+Set ``CP_SCRAPER_CACHE_DIR`` to relocate the cache and ``CP_SCRAPER_NO_CACHE``
+to bypass it entirely.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol
+
+from . import trace
+
+CACHE_DIR_ENV = "CP_SCRAPER_CACHE_DIR"
+NO_CACHE_ENV = "CP_SCRAPER_NO_CACHE"
+DB_NAME = "http.sqlite3"
+MAX_BYTES = 256 * 1024 * 1024
+
+# Statements, task lists and samples of a contest that has been published.
+TTL_IMMUTABLE = 30 * 24 * 60 * 60
+# Contest lists and archives that grow as new rounds are announced.
+TTL_VOLATILE = 60 * 60
+
+Ttl = float | Callable[[str], float]
+
+
+class Response(Protocol):
+    @property
+    def status_code(self) -> int: ...
+
+    @property
+    def text(self) -> str: ...
+
+    @property
+    def headers(self) -> Mapping[str, str]: ...
+
+    def raise_for_status(self) -> Any: ...
+
+
+@dataclass
+class TextResponse:
+    """Response adapter for transports that are not requests/httpx."""
+
+    status_code: int
+    text: str
+    headers: Mapping[str, str]
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+@dataclass
+class CachedResponse:
+    body: str
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    def validators(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    def __init__(self, path: Path, max_bytes: int = MAX_BYTES) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+            """
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)"
+        )
+
+    def get(self, url: str) -> CachedResponse | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, etag, last_modified, expires_at FROM responses "
+                "WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                (time.time(), url),
+            )
+        return CachedResponse(*row)
+
+    def put(self, url: str, body: str, headers: Mapping[str, str], ttl: float) -> None:
+        now = time.time()
+        size = len(body.encode())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, body, etag, last_modified, expires_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    body,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    now + ttl,
+                    now,
+                    size,
+                ),
+            )
+            self._evict()
+
+    def refresh(self, url: str, headers: Mapping[str, str], ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET expires_at = ?, accessed_at = ?, "
+                "etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (
+                    now + ttl,
+                    now,
+                    headers.get("etag"),
+                    headers.get("last-modified"),
+                    url,
+                ),
+            )
+
+    def _evict(self) -> None:
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims: list[str] = []
+        for url, size in self._db.execute(
+            "SELECT url, size FROM responses ORDER BY accessed_at ASC"
+        ):
+            victims.append(url)
+            excess -= size
+            if excess <= 0:
+                break
+        self._db.executemany(
+            "DELETE FROM responses WHERE url = ?", [(u,) for u in victims]
+        )
+
+
+_caches: dict[Path, ResponseCache] = {}
+
+
+def cache_dir() -> Path:
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return Path(xdg) / "cp-nvim"
+
+
+def get_cache() -> ResponseCache | None:
+    if os.environ.get(NO_CACHE_ENV):
+        return None
+    path = cache_dir() / DB_NAME
+    cache = _caches.get(path)
+    if cache is None:
+        try:
+            cache = ResponseCache(path)
+        except (OSError, sqlite3.Error):
+            return None
+        _caches[path] = cache
+    return cache
+
+
+def load_state(name: str) -> Any | None:
+    """Read a scraper's persisted JSON state, or None if absent or corrupt."""
+    try:
+        with open(cache_dir() / f"{name}.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_state(name: str, data: Any) -> None:
+    path = cache_dir() / f"{name}.json"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _resolve_ttl(ttl: Ttl, body: str) -> float:
+    return ttl(body) if callable(ttl) else ttl
+
+
+def _store(cache: ResponseCache, url: str, r: Response, ttl: Ttl) -> str:
+    body = r.text
+    seconds = _resolve_ttl(ttl, body)
+    if seconds > 0:
+        cache.put(url, body, r.headers, seconds)
+    return body
+
+
+class SharedFetches:
+    """Pages fetched by one step of a run, each handed once to a later step.
+
+    Pages are recorded until :meth:`freeze`; a later fetch of the same URL
+    takes the body instead of going to the cache or the network.
+    """
+
+    def __init__(self) -> None:
+        self._bodies: dict[str, str] = {}
+        self._recording = True
+
+    def take(self, url: str) -> str | None:
+        return self._bodies.pop(url, None)
+
+    def put(self, url: str, body: str) -> str:
+        if self._recording:
+            self._bodies[url] = body
+        return body
+
+    def freeze(self) -> None:
+        self._recording = False
+
+
+_shared: ContextVar[SharedFetches | None] = ContextVar("shared_fetches", default=None)
+
+
+@contextmanager
+def shared_fetches() -> Iterator[SharedFetches]:
+    shared = SharedFetches()
+    token = _shared.set(shared)
+    try:
+        yield shared
+    finally:
+        _shared.reset(token)
+
+
+def _note(span: "trace.Span | None", cache: str, body: str, status: int) -> str:
+    if span is not None:
+        span.set(cache=cache, status=status, bytes=len(body.encode()))
+    return body
+
+
+def fetch_cached(url: str, send: Callable[[dict[str, str]], Response], ttl: Ttl) -> str:
+    """Fetch ``url`` through the cache with a blocking ``send``.
+
+    ``send`` receives the conditional request headers to add and returns a
+    requests/httpx-style response. ``ttl`` is a lifetime in seconds or a
+    callable computing one from the body; a non-positive value skips storing.
+    """
+    shared = _shared.get()
+    if shared is None:
+        return _fetch_cached(url, send, ttl)
+    body = shared.take(url)
+    if body is not None:
+        with trace.span("fetch", url=url) as span:
+            return _note(span, "shared", body, 200)
+    return shared.put(url, _fetch_cached(url, send, ttl))
+
+
+def _fetch_cached(
+    url: str, send: Callable[[dict[str, str]], Response], ttl: Ttl
+) -> str:
+    with trace.span("fetch", url=url) as span:
+        cache = get_cache()
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and entry.fresh:
+            return _note(span, "hit", entry.body, 200)
+        queued = span.fields.get("queue_ms", 0) if span is not None else 0
+        start = time.perf_counter()
+        r = send(entry.validators() if entry is not None else {})
+        if span is not None and "network_ms" not in span.fields:
+            # Blocking transports are timed here; rate-limit waits inside
+            # ``send`` are already counted as queue time.
+            queued = span.fields.get("queue_ms", 0) - queued
+            span.add("network_ms", (time.perf_counter() - start) * 1000 - queued)
+        if cache is None:
+            r.raise_for_status()
+            return _note(span, "off", r.text, r.status_code)
+        if r.status_code == 304 and entry is not None:
+            cache.refresh(url, r.headers, _resolve_ttl(ttl, entry.body))
+            return _note(span, "revalidated", entry.body, r.status_code)
+        r.raise_for_status()
+        return _note(span, "miss", _store(cache, url, r, ttl), r.status_code)
+
+
+async def fetch_cached_async(
+    url: str, send: Callable[[dict[str, str]], Awaitable[Response]], ttl: Ttl
+) -> str:
+    """Async counterpart of :func:`fetch_cached`."""
+    shared = _shared.get()
+    if shared is None:
+        return await _fetch_cached_async(url, send, ttl)
+    body = shared.take(url)
+    if body is not None:
+        with trace.span("fetch", url=url) as span:
+            return _note(span, "shared", body, 200)
+    return shared.put(url, await _fetch_cached_async(url, send, ttl))
+
+
+async def _fetch_cached_async(
+    url: str, send: Callable[[dict[str, str]], Awaitable[Response]], ttl: Ttl
+) -> str:
+    with trace.span("fetch", url=url) as span:
+        cache = get_cache()
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and entry.fresh:
+            return _note(span, "hit", entry.body, 200)
+        r = await send(entry.validators() if entry is not None else {})
+        if cache is None:
+            r.raise_for_status()
+            return _note(span, "off", r.text, r.status_code)
+        if r.status_code == 304 and entry is not None:
+            cache.refresh(url, r.headers, _resolve_ttl(ttl, entry.body))
+            return _note(span, "revalidated", entry.body, r.status_code)
+        r.raise_for_status()
+        return _note(span, "miss", _store(cache, url, r, ttl), r.status_code)
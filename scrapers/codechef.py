@@ -3,20 +3,33 @@
 import asyncio
 import json
 import re
-from typing import Any
-
-import httpx
-from scrapling.fetchers import Fetcher
+import time
+from collections.abc import Awaitable
+from typing import TYPE_CHECKING
 
+from . import trace
 from .base import BaseScraper
+from .cache import (
+    TTL_IMMUTABLE,
+    TTL_VOLATILE,
+    Ttl,
+    fetch_cached_async,
+    load_state,
+    save_state,
+)
+from .fetch import get_with_retry
 from .models import (
     ContestListResult,
     ContestSummary,
     MetadataResult,
     ProblemSummary,
+    ScraperConfig,
     TestCase,
 )
 
+if TYPE_CHECKING:
+    import httpx
+
 BASE_URL = "https://www.codechef.com"
 API_CONTESTS_ALL = "/api/list/contests/all"
 API_CONTEST = "/api/contests/{contest_id}"
@@ -25,46 +38,117 @@ PROBLEM_URL = "https://www.codechef.com/problems/{problem_id}"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
-TIMEOUT_S = 15.0
-CONNECTIONS = 8
+CONFIG = ScraperConfig(
+    timeout_seconds=15,
+    max_retries=3,
+    backoff_base=0.5,
+    rate_limit_delay=0.05,
+    burst=8,
+    concurrency=8,
+    max_concurrency=32,
+)
+STARTERS_STATE = "codechef_starters"
+# Rounds that are not over yet, or do not exist, with when they were checked.
+STARTERS_PENDING_STATE = "codechef_starters_pending"
+STARTERS_RECHECK_S = 12 * 3600
+MEMORY_STATE = "codechef_memory_limits"
 MEMORY_LIMIT_RE = re.compile(
     r"Memory\s+[Ll]imit.*?([0-9.]+)\s*(MB|GB)", re.IGNORECASE | re.DOTALL
 )
+DEFAULT_MEMORY_MB = 256.0
+
+
+def _contest_finished(data: dict) -> bool:
+    try:
+        t = data.get("time") or {}
+        end = float(t.get("end") or t.get("end_date") or 0)
+        current = float(t.get("current") or 0)
+    except (ValueError, TypeError, AttributeError):
+        return False
+    return 0 < end < current
+
+
+def _contest_ttl(body: str) -> float:
+    """Cache contest and problem payloads only once the contest is over."""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return 0
+    return TTL_IMMUTABLE if isinstance(data, dict) and _contest_finished(data) else 0
+
+
+async def fetch_text(client: "httpx.AsyncClient", url: str, ttl: Ttl) -> str:
+    def send(extra: dict[str, str]) -> Awaitable["httpx.Response"]:
+        return get_with_retry(client, url, CONFIG, {**HEADERS, **extra})
+
+    return await fetch_cached_async(url, send, ttl)
 
 
-async def fetch_json(client: httpx.AsyncClient, path: str) -> dict:
-    r = await client.get(BASE_URL + path, headers=HEADERS, timeout=TIMEOUT_S)
-    r.raise_for_status()
-    return r.json()
+async def fetch_json(
+    client: "httpx.AsyncClient", path: str, ttl: Ttl = _contest_ttl
+) -> dict:
+    return json.loads(await fetch_text(client, BASE_URL + path, ttl))
 
 
-def _extract_memory_limit(html: str) -> float:
+def _extract_memory_limit(html: str) -> float | None:
     m = MEMORY_LIMIT_RE.search(html)
     if not m:
-        return 256.0
-    value = float(m.group(1))
-    unit = m.group(2).upper()
-    if unit == "GB":
-        return value * 1024.0
-    return value
+        return None
+    mb = float(m.group(1))
+    return mb * 1024.0 if m.group(2).upper() == "GB" else mb
 
 
-def _fetch_html_sync(url: str) -> str:
-    response = Fetcher.get(url)
-    return str(response.body)
+def _problem_page_ttl(html: str) -> float:
+    # A page the limit cannot be read from is not worth pinning.
+    return TTL_IMMUTABLE if MEMORY_LIMIT_RE.search(html) else 0
 
 
 class CodeChefScraper(BaseScraper):
+    max_connections = CONFIG.max_concurrency
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._memory_limits: dict[str, float] | None = None
+
+    def _known_memory_limits(self) -> dict[str, float]:
+        if self._memory_limits is None:
+            state = load_state(MEMORY_STATE)
+            self._memory_limits = state if isinstance(state, dict) else {}
+        return self._memory_limits
+
+    async def _memory_limit(
+        self, client: "httpx.AsyncClient", problem_code: str
+    ) -> float:
+        """The problem's memory limit in MB, fetching its page at most once.
+
+        The problem API has no memory limit, only the problem page does, so
+        limits read from it are remembered per problem code across runs.
+        """
+        known = self._known_memory_limits()
+        if problem_code in known:
+            return known[problem_code]
+        try:
+            html = await fetch_text(
+                client, PROBLEM_URL.format(problem_id=problem_code), _problem_page_ttl
+            )
+        except Exception:
+            return DEFAULT_MEMORY_MB
+        with trace.span("parse", parser="regex"):
+            mb = _extract_memory_limit(html)
+        if mb is None:
+            return DEFAULT_MEMORY_MB
+        known[problem_code] = mb
+        return mb
+
     @property
     def platform_name(self) -> str:
         return "codechef"
 
     async def scrape_contest_metadata(self, contest_id: str) -> MetadataResult:
         try:
-            async with httpx.AsyncClient() as client:
-                data = await fetch_json(
-                    client, API_CONTEST.format(contest_id=contest_id)
-                )
+            data = await fetch_json(
+                self._http_client(), API_CONTEST.format(contest_id=contest_id)
+            )
             if not data.get("problems"):
                 return self._metadata_error(
                     f"No problems found for contest {contest_id}"
@@ -89,163 +173,134 @@ class CodeChefScraper(BaseScraper):
             return self._metadata_error(f"Failed to fetch contest {contest_id}: {e}")
 
     async def scrape_contest_list(self) -> ContestListResult:
-        async with httpx.AsyncClient() as client:
+        import httpx
+
+        client = self._http_client()
+        try:
+            data = await fetch_json(client, API_CONTESTS_ALL, TTL_VOLATILE)
+        except httpx.HTTPStatusError as e:
+            return self._contests_error(f"Failed to fetch contests: {e}")
+        all_contests = data.get("future_contests", []) + data.get("past_contests", [])
+        max_num = 0
+        for contest in all_contests:
+            contest_code = contest.get("contest_code", "")
+            if contest_code.startswith("START"):
+                match = re.match(r"START(\d+)", contest_code)
+                if match:
+                    num = int(match.group(1))
+                    max_num = max(max_num, num)
+        if max_num == 0:
+            return self._contests_error("No Starters contests found")
+        # Division lists of finished Starters never change, so they are kept
+        # across runs. Unfinished and missing rounds are rechecked only once
+        # STARTERS_RECHECK_S has passed.
+        state = load_state(STARTERS_STATE)
+        finished: dict[str, list[list[str]]] = state if isinstance(state, dict) else {}
+        state = load_state(STARTERS_PENDING_STATE)
+        now = time.time()
+        pending: dict[str, list] = {
+            k: v
+            for k, v in (state if isinstance(state, dict) else {}).items()
+            if isinstance(v, list) and len(v) == 2 and now - v[0] < STARTERS_RECHECK_S
+        }
+
+        async def fetch_divisions(i: int) -> list[list[str]]:
+            known = finished.get(str(i))
+            if known is not None:
+                return known
+            if str(i) in pending:
+                return pending[str(i)][1]
+            parent_id = f"START{i}"
             try:
-                data = await fetch_json(client, API_CONTESTS_ALL)
-            except httpx.HTTPStatusError as e:
-                return self._contests_error(f"Failed to fetch contests: {e}")
-            all_contests = data.get("future_contests", []) + data.get(
-                "past_contests", []
-            )
-            max_num = 0
-            for contest in all_contests:
-                contest_code = contest.get("contest_code", "")
-                if contest_code.startswith("START"):
-                    match = re.match(r"START(\d+)", contest_code)
-                    if match:
-                        num = int(match.group(1))
-                        max_num = max(max_num, num)
-            if max_num == 0:
-                return self._contests_error("No Starters contests found")
-            contests = []
-            sem = asyncio.Semaphore(CONNECTIONS)
-
-            async def fetch_divisions(i: int) -> list[ContestSummary]:
-                parent_id = f"START{i}"
-                async with sem:
-                    try:
-                        parent_data = await fetch_json(
-                            client, API_CONTEST.format(contest_id=parent_id)
-                        )
-                    except Exception as e:
-                        import sys
-
-                        print(f"Error fetching {parent_id}: {e}", file=sys.stderr)
-                        return []
-                child_contests = parent_data.get("child_contests", {})
-                if not child_contests:
-                    return []
-                base_name = f"Starters {i}"
-                divisions = []
-                for div_key, div_data in child_contests.items():
-                    div_code = div_data.get("contest_code", "")
-                    div_num = div_data.get("div", {}).get("div_number", "")
-                    if div_code and div_num:
-                        divisions.append(
-                            ContestSummary(
-                                id=div_code,
-                                name=base_name,
-                                display_name=f"{base_name} (Div. {div_num})",
-                            )
-                        )
-                return divisions
+                parent_data = await fetch_json(
+                    client, API_CONTEST.format(contest_id=parent_id)
+                )
+            except httpx.HTTPStatusError:
+                # No such round; numbering has gaps.
+                pending[str(i)] = [now, []]
+                return []
+            except Exception as e:
+                import sys
 
-            tasks = [fetch_divisions(i) for i in range(1, max_num + 1)]
-            for coro in asyncio.as_completed(tasks):
-                divisions = await coro
-                contests.extend(divisions)
+                print(f"Error fetching {parent_id}: {e}", file=sys.stderr)
+                return []
+            divisions = []
+            for div_data in (parent_data.get("child_contests") or {}).values():
+                div_code = div_data.get("contest_code", "")
+                div_num = div_data.get("div", {}).get("div_number", "")
+                if div_code and div_num:
+                    divisions.append([div_code, str(div_num)])
+            if _contest_finished(parent_data):
+                finished[str(i)] = divisions
+            else:
+                pending[str(i)] = [now, divisions]
+            return divisions
+
+        results = await asyncio.gather(
+            *(fetch_divisions(i) for i in range(1, max_num + 1))
+        )
+        save_state(STARTERS_STATE, finished)
+        save_state(STARTERS_PENDING_STATE, pending)
+        contests = [
+            ContestSummary(
+                id=div_code,
+                name=f"Starters {i}",
+                display_name=f"Starters {i} (Div. {div_num})",
+            )
+            for i, divisions in enumerate(results, start=1)
+            for div_code, div_num in divisions
+        ]
         return ContestListResult(success=True, error="", contests=contests)
 
     async def stream_tests_for_category_async(self, category_id: str) -> None:
-        async with httpx.AsyncClient(
-            limits=httpx.Limits(max_connections=CONNECTIONS)
-        ) as client:
+        client = self._http_client()
+        contest_data = await fetch_json(
+            client, API_CONTEST.format(contest_id=category_id)
+        )
+        all_problems = contest_data.get("problems", {})
+        if not all_problems:
+            raise ValueError(f"No problems found for contest {category_id}")
+        problems = {
+            code: data
+            for code, data in all_problems.items()
+            if data.get("category_name") == "main"
+        }
+        if not problems:
+            raise ValueError(f"No main problems found for contest {category_id}")
+        self._emit_manifest(list(problems))
+
+        async def run_one(problem_code: str) -> None:
             try:
-                contest_data = await fetch_json(
-                    client, API_CONTEST.format(contest_id=category_id)
-                )
-            except Exception as e:
-                print(
-                    json.dumps(
-                        {"error": f"Failed to fetch contest {category_id}: {str(e)}"}
-                    ),
-                    flush=True,
+                problem_data = await fetch_json(
+                    client,
+                    API_PROBLEM.format(contest_id=category_id, problem_id=problem_code),
                 )
-                return
-            all_problems = contest_data.get("problems", {})
-            if not all_problems:
-                print(
-                    json.dumps(
-                        {"error": f"No problems found for contest {category_id}"}
-                    ),
-                    flush=True,
-                )
-                return
-            problems = {
-                code: data
-                for code, data in all_problems.items()
-                if data.get("category_name") == "main"
-            }
-            if not problems:
-                print(
-                    json.dumps(
-                        {"error": f"No main problems found for contest {category_id}"}
-                    ),
-                    flush=True,
+                sample_tests = (
+                    problem_data.get("problemComponents", {}).get("sampleTestCases", [])
+                    or []
                 )
-                return
-            sem = asyncio.Semaphore(CONNECTIONS)
-
-            async def run_one(problem_code: str) -> dict[str, Any]:
-                async with sem:
-                    try:
-                        problem_data = await fetch_json(
-                            client,
-                            API_PROBLEM.format(
-                                contest_id=category_id, problem_id=problem_code
-                            ),
-                        )
-                        sample_tests = (
-                            problem_data.get("problemComponents", {}).get(
-                                "sampleTestCases", []
-                            )
-                            or []
-                        )
-                        tests = [
-                            TestCase(
-                                input=t.get("input", "").strip(),
-                                expected=t.get("output", "").strip(),
-                            )
-                            for t in sample_tests
-                            if not t.get("isDeleted", False)
-                        ]
-                        time_limit_str = problem_data.get("max_timelimit", "1")
-                        timeout_ms = int(float(time_limit_str) * 1000)
-                        problem_url = PROBLEM_URL.format(problem_id=problem_code)
-                        loop = asyncio.get_event_loop()
-                        html = await loop.run_in_executor(
-                            None, _fetch_html_sync, problem_url
-                        )
-                        memory_mb = _extract_memory_limit(html)
-                        interactive = False
-                    except Exception:
-                        tests = []
-                        timeout_ms = 1000
-                        memory_mb = 256.0
-                        interactive = False
-                    combined_input = "\n".join(t.input for t in tests) if tests else ""
-                    combined_expected = (
-                        "\n".join(t.expected for t in tests) if tests else ""
+                tests = [
+                    TestCase(
+                        input=t.get("input", "").strip(),
+                        expected=t.get("output", "").strip(),
                     )
-                    return {
-                        "problem_id": problem_code,
-                        "combined": {
-                            "input": combined_input,
-                            "expected": combined_expected,
-                        },
-                        "tests": [
-                            {"input": t.input, "expected": t.expected} for t in tests
-                        ],
-                        "timeout_ms": timeout_ms,
-                        "memory_mb": memory_mb,
-                        "interactive": interactive,
-                        "multi_test": False,
-                    }
-
-            tasks = [run_one(problem_code) for problem_code in problems.keys()]
-            for coro in asyncio.as_completed(tasks):
-                payload = await coro
-                print(json.dumps(payload), flush=True)
+                    for t in sample_tests
+                    if not t.get("isDeleted", False)
+                ]
+                time_limit_str = problem_data.get("max_timelimit", "1")
+                timeout_ms = int(float(time_limit_str) * 1000)
+            except Exception as e:
+                self._emit_problem_error(problem_code, str(e))
+                return
+            memory_mb = await self._memory_limit(client, problem_code)
+            self._emit_problem(
+                self._tests_payload(problem_code, tests, timeout_ms, memory_mb)
+            )
+
+        known = dict(self._known_memory_limits())
+        await asyncio.gather(*(run_one(code) for code in problems))
+        if self._known_memory_limits() != known:
+            save_state(MEMORY_STATE, self._memory_limits)
 
 
 if __name__ == "__main__":
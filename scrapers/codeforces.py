@@ -4,20 +4,26 @@ import asyncio
 import json
 import logging
 import re
-from typing import Any
-
-import requests
-from bs4 import BeautifulSoup, Tag
-from scrapling.fetchers import Fetcher
+import time
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
 
 from .base import BaseScraper
+from .cache import TTL_IMMUTABLE, TTL_VOLATILE, TextResponse, fetch_cached
+from .fetch import host_concurrency, host_limiter
 from .models import (
+    CombinedTest,
     ContestListResult,
     ContestSummary,
     MetadataResult,
     ProblemSummary,
+    ScraperConfig,
     TestCase,
 )
+from .soup import make_soup
+
+if TYPE_CHECKING:
+    from bs4 import Tag
 
 # suppress scrapling logging - https://github.com/D4Vinci/Scrapling/issues/31)
 logging.getLogger("scrapling").setLevel(logging.CRITICAL)
@@ -25,13 +31,16 @@ logging.getLogger("scrapling").setLevel(logging.CRITICAL)
 
 BASE_URL = "https://codeforces.com"
 API_CONTEST_LIST_URL = f"{BASE_URL}/api/contest.list"
-TIMEOUT_SECONDS = 30
+# Codeforces allows roughly one API call every two seconds per client.
+CONFIG = ScraperConfig(timeout_seconds=30, rate_limit_delay=2.0, burst=2)
+PROBLEM_HOLDER_RE = re.compile(r'<div\s[^>]*class="problemindexholder"')
+PROBLEM_INDEX_RE = re.compile(r'\sproblemindex="([^"]+)"')
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
 }
 
 
-def _text_from_pre(pre: Tag) -> str:
+def _text_from_pre(pre: "Tag") -> str:
     return (
         pre.get_text(separator="\n", strip=False)
         .replace("\r", "")
@@ -40,7 +49,7 @@ def _text_from_pre(pre: Tag) -> str:
     )
 
 
-def _extract_limits(block: Tag) -> tuple[int, float]:
+def _extract_limits(block: "Tag") -> tuple[int, float]:
     tdiv = block.find("div", class_="time-limit")
     mdiv = block.find("div", class_="memory-limit")
     timeout_ms = 0
@@ -58,7 +67,7 @@ def _extract_limits(block: Tag) -> tuple[int, float]:
     return timeout_ms, memory_mb
 
 
-def _group_lines_by_id(pre: Tag) -> dict[int, list[str]]:
+def _group_lines_by_id(pre: "Tag") -> dict[int, list[str]]:
     groups: dict[int, list[str]] = {}
     for div in pre.find_all("div", class_="test-example-line"):
         cls = " ".join(div.get("class", []))
@@ -70,7 +79,7 @@ def _group_lines_by_id(pre: Tag) -> dict[int, list[str]]:
     return groups
 
 
-def _extract_title(block: Tag) -> tuple[str, str]:
+def _extract_title(block: "Tag") -> tuple[str, str]:
     t = block.find("div", class_="title")
     if not t:
         return "", ""
@@ -81,7 +90,9 @@ def _extract_title(block: Tag) -> tuple[str, str]:
     return parts[0].strip().upper(), parts[1].strip()
 
 
-def _extract_samples(block: Tag) -> tuple[list[TestCase], bool]:
+def _extract_samples(block: "Tag") -> tuple[list[TestCase], bool]:
+    from bs4 import Tag
+
     st = block.find("div", class_="sample-test")
     if not st:
         return [], False
@@ -132,62 +143,133 @@ def _extract_samples(block: Tag) -> tuple[list[TestCase], bool]:
     return [TestCase(input=inputs[i], expected=outputs[i]) for i in range(n)], False
 
 
-def _is_interactive(block: Tag) -> bool:
+def _is_interactive(block: "Tag") -> bool:
     ps = block.find("div", class_="problem-statement")
     txt = ps.get_text(" ", strip=True) if ps else block.get_text(" ", strip=True)
     return "This is an interactive problem" in txt
 
 
+def _problems_ttl(html: str) -> float:
+    # Before a round starts the page has no statements; don't pin that.
+    return TTL_IMMUTABLE if "problemindexholder" in html else 0
+
+
 def _fetch_problems_html(contest_id: str) -> str:
+    from scrapling.fetchers import Fetcher
+
     url = f"{BASE_URL}/contest/{contest_id}/problems"
-    page = Fetcher.get(
-        url,
-    )
-    return page.html_content
 
+    def send(extra: dict[str, str]) -> TextResponse:
+        with host_concurrency(url, CONFIG).slot_sync() as outcome:
+            host_limiter(url, CONFIG).acquire_sync()
+            outcome.sent = time.perf_counter()
+            page = Fetcher.get(url, headers=extra) if extra else Fetcher.get(url)
+            outcome.status = getattr(page, "status", 200)
+        headers = {
+            k.lower(): v for k, v in (getattr(page, "headers", None) or {}).items()
+        }
+        return TextResponse(getattr(page, "status", 200), page.html_content, headers)
+
+    return fetch_cached(url, send, _problems_ttl)
+
+
+def _fetch_contest_list_json() -> str:
+    import requests
+
+    def send(extra: dict[str, str]) -> "requests.Response":
+        limiter = host_concurrency(API_CONTEST_LIST_URL, CONFIG)
+        with limiter.slot_sync() as outcome:
+            host_limiter(API_CONTEST_LIST_URL, CONFIG).acquire_sync()
+            outcome.sent = time.perf_counter()
+            r = requests.get(
+                API_CONTEST_LIST_URL,
+                headers=extra,
+                timeout=CONFIG.timeout_seconds,
+            )
+            outcome.status = r.status_code
+        return r
+
+    return fetch_cached(API_CONTEST_LIST_URL, send, TTL_VOLATILE)
+
+
+def _split_holders(html: str) -> list[str]:
+    """Cut the page into one chunk per problem so each parses on its own."""
+    starts = [m.start() for m in PROBLEM_HOLDER_RE.finditer(html)]
+    if not starts:
+        return [html]
+    ends = starts[1:] + [len(html)]
+    return [html[a:b] for a, b in zip(starts, ends)]
+
+
+def _problem_ids(html: str) -> list[str]:
+    """Problem letters of a contest page, read without building a tree.
+
+    Markup the regexes do not recognise falls back to a full parse.
+    """
+    if PROBLEM_HOLDER_RE.search(html):
+        matches = [PROBLEM_INDEX_RE.search(c) for c in _split_holders(html)]
+        if all(matches):
+            return [m.group(1).lower() for m in matches if m]
+    from bs4 import SoupStrainer
+
+    strainer = SoupStrainer("div", class_="problemindexholder")
+    soup = make_soup(html, parse_only=strainer)
+    return [
+        str(h.get("problemindex")).strip().lower()
+        for h in soup.find_all("div", class_="problemindexholder")
+        if h.get("problemindex")
+    ]
 
-def _parse_all_blocks(html: str) -> list[dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
-    blocks = soup.find_all("div", class_="problem-statement")
-    out: list[dict[str, Any]] = []
-    for b in blocks:
-        holder = b.find_parent("div", class_="problemindexholder")
-        letter = (holder.get("problemindex") if holder else "").strip().upper()
-        name = _extract_title(b)[1]
-        if not letter:
-            continue
-        raw_samples, is_grouped = _extract_samples(b)
-        timeout_ms, memory_mb = _extract_limits(b)
-        interactive = _is_interactive(b)
 
-        if is_grouped and raw_samples:
-            combined_input = f"{len(raw_samples)}\n" + "\n".join(
-                tc.input for tc in raw_samples
-            )
-            combined_expected = "\n".join(tc.expected for tc in raw_samples)
-            individual_tests = [
-                TestCase(input=f"1\n{tc.input}", expected=tc.expected)
-                for tc in raw_samples
-            ]
-        else:
-            combined_input = "\n".join(tc.input for tc in raw_samples)
-            combined_expected = "\n".join(tc.expected for tc in raw_samples)
-            individual_tests = raw_samples
-
-        out.append(
-            {
-                "letter": letter,
-                "name": name,
-                "combined_input": combined_input,
-                "combined_expected": combined_expected,
-                "tests": individual_tests,
-                "timeout_ms": timeout_ms,
-                "memory_mb": memory_mb,
-                "interactive": interactive,
-                "multi_test": is_grouped,
-            }
+def _parse_block(b: "Tag") -> dict[str, Any] | None:
+    holder = b.find_parent("div", class_="problemindexholder")
+    letter = (holder.get("problemindex") if holder else "").strip().upper()
+    name = _extract_title(b)[1]
+    if not letter:
+        return None
+    raw_samples, is_grouped = _extract_samples(b)
+    timeout_ms, memory_mb = _extract_limits(b)
+    interactive = _is_interactive(b)
+
+    if is_grouped and raw_samples:
+        combined_input = f"{len(raw_samples)}\n" + "\n".join(
+            tc.input for tc in raw_samples
         )
-    return out
+        combined_expected = "\n".join(tc.expected for tc in raw_samples)
+        individual_tests = [
+            TestCase(input=f"1\n{tc.input}", expected=tc.expected) for tc in raw_samples
+        ]
+    else:
+        combined_input = "\n".join(tc.input for tc in raw_samples)
+        combined_expected = "\n".join(tc.expected for tc in raw_samples)
+        individual_tests = raw_samples
+    return {
+        "letter": letter,
+        "name": name,
+        "combined_input": combined_input,
+        "combined_expected": combined_expected,
+        "tests": individual_tests,
+        "timeout_ms": timeout_ms,
+        "memory_mb": memory_mb,
+        "interactive": interactive,
+        "multi_test": is_grouped,
+    }
+
+
+def _iter_blocks(html: str) -> Iterator[dict[str, Any]]:
+    from bs4 import SoupStrainer
+
+    strainer = SoupStrainer("div", class_="problemindexholder")
+    for chunk in _split_holders(html):
+        soup = make_soup(chunk, parse_only=strainer)
+        for b in soup.find_all("div", class_="problem-statement"):
+            block = _parse_block(b)
+            if block is not None:
+                yield block
+
+
+def _parse_all_blocks(html: str) -> list[dict[str, Any]]:
+    return list(_iter_blocks(html))
 
 
 def _scrape_contest_problems_sync(contest_id: str) -> list[ProblemSummary]:
@@ -226,9 +308,7 @@ class CodeforcesScraper(BaseScraper):
 
     async def scrape_contest_list(self) -> ContestListResult:
         try:
-            r = requests.get(API_CONTEST_LIST_URL, timeout=TIMEOUT_SECONDS)
-            r.raise_for_status()
-            data = r.json()
+            data = json.loads(await asyncio.to_thread(_fetch_contest_list_json))
             if data.get("status") != "OK":
                 return self._contests_error("Invalid API response")
 
@@ -249,29 +329,28 @@ class CodeforcesScraper(BaseScraper):
 
     async def stream_tests_for_category_async(self, category_id: str) -> None:
         html = await asyncio.to_thread(_fetch_problems_html, category_id)
-        blocks = await asyncio.to_thread(_parse_all_blocks, html)
-
-        for b in blocks:
-            pid = b["letter"].lower()
-            tests: list[TestCase] = b.get("tests", [])
-            print(
-                json.dumps(
-                    {
-                        "problem_id": pid,
-                        "combined": {
-                            "input": b.get("combined_input", ""),
-                            "expected": b.get("combined_expected", ""),
-                        },
-                        "tests": [
-                            {"input": t.input, "expected": t.expected} for t in tests
-                        ],
-                        "timeout_ms": b.get("timeout_ms", 0),
-                        "memory_mb": b.get("memory_mb", 0),
-                        "interactive": bool(b.get("interactive")),
-                        "multi_test": bool(b.get("multi_test", False)),
-                    }
-                ),
-                flush=True,
+        problem_ids = _problem_ids(html)
+        if not problem_ids:
+            raise ValueError(f"No problems found for contest {category_id}")
+        self._emit_manifest(problem_ids)
+        blocks = _iter_blocks(html)
+
+        # Parse one problem at a time so the first payload goes out as soon
+        # as its block is ready rather than after the whole page.
+        while (b := await asyncio.to_thread(next, blocks, None)) is not None:
+            self._emit_problem(
+                self._tests_payload(
+                    b["letter"].lower(),
+                    b.get("tests", []),
+                    timeout_ms=b.get("timeout_ms", 0),
+                    memory_mb=b.get("memory_mb", 0),
+                    interactive=bool(b.get("interactive")),
+                    multi_test=bool(b.get("multi_test", False)),
+                    combined=CombinedTest(
+                        input=b.get("combined_input", ""),
+                        expected=b.get("combined_expected", ""),
+                    ),
+                )
             )
 
 
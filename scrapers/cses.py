@@ -1,29 +1,45 @@
 #!/usr/bin/env python3
 
 import asyncio
-import json
 import re
-from typing import Any
+from collections.abc import Awaitable
+from typing import TYPE_CHECKING
 
-import httpx
-
-from .base import BaseScraper
+from . import trace
+from .base import BaseScraper, io_writer
+from .cache import TTL_IMMUTABLE, TTL_VOLATILE, Ttl, fetch_cached_async
+from .fetch import get_with_retry
 from .models import (
     ContestListResult,
     ContestSummary,
     MetadataResult,
     ProblemSummary,
+    ScraperConfig,
     TestCase,
 )
 
+if TYPE_CHECKING:
+    import httpx
+
 BASE_URL = "https://cses.fi"
 INDEX_PATH = "/problemset"
 TASK_PATH = "/problemset/task/{id}"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 }
-TIMEOUT_S = 15.0
-CONNECTIONS = 8
+# Pseudo-category naming the whole problemset. With ``--write-io`` its tests
+# stream keeps a checkpoint of finished tasks beside the files and skips them
+# when run again, so a full mirror can be built by rerunning until done.
+ALL_CATEGORIES = "all"
+CONFIG = ScraperConfig(
+    timeout_seconds=15,
+    max_retries=3,
+    backoff_base=0.5,
+    rate_limit_delay=0.05,
+    burst=8,
+    concurrency=8,
+    max_concurrency=32,
+)
 
 
 def normalize_category_name(category_name: str) -> str:
@@ -63,10 +79,15 @@ def snake_to_title(name: str) -> str:
     return " ".join(map(fix_word, enumerate(words)))
 
 
-async def fetch_text(client: httpx.AsyncClient, path: str) -> str:
-    r = await client.get(BASE_URL + path, headers=HEADERS, timeout=TIMEOUT_S)
-    r.raise_for_status()
-    return r.text
+async def fetch_text(
+    client: "httpx.AsyncClient", path: str, ttl: Ttl = TTL_IMMUTABLE
+) -> str:
+    url = BASE_URL + path
+
+    def send(extra: dict[str, str]) -> Awaitable["httpx.Response"]:
+        return get_with_retry(client, url, CONFIG, {**HEADERS, **extra})
+
+    return await fetch_cached_async(url, send, ttl)
 
 
 CATEGORY_BLOCK_RE = re.compile(
@@ -129,6 +150,26 @@ def parse_category_problems(category_id: str, html: str) -> list[ProblemSummary]
     return []
 
 
+def parse_problemset(html: str) -> list[ProblemSummary]:
+    """Every task of every category, in index order."""
+    out: dict[str, ProblemSummary] = {}
+    for m in CATEGORY_BLOCK_RE.finditer(html):
+        if m.group("cat").strip() == "General":
+            continue
+        for mm in TASK_LINK_RE.finditer(m.group("body")):
+            out.setdefault(
+                mm.group("id"),
+                ProblemSummary(id=mm.group("id"), name=mm.group("title")),
+            )
+    return list(out.values())
+
+
+def _problems_for(category_id: str, html: str) -> list[ProblemSummary]:
+    if category_id == ALL_CATEGORIES:
+        return parse_problemset(html)
+    return parse_category_problems(category_id, html)
+
+
 def _extract_problem_info(html: str) -> tuple[int, int, bool]:
     tm = TIME_RE.search(html)
     mm = MEM_RE.search(html)
@@ -179,14 +220,15 @@ def task_path(problem_id: str | int) -> str:
 
 
 class CSESScraper(BaseScraper):
+    max_connections = CONFIG.max_concurrency
+
     @property
     def platform_name(self) -> str:
         return "cses"
 
     async def scrape_contest_metadata(self, contest_id: str) -> MetadataResult:
-        async with httpx.AsyncClient() as client:
-            html = await fetch_text(client, INDEX_PATH)
-        problems = parse_category_problems(contest_id, html)
+        html = await fetch_text(self._http_client(), INDEX_PATH, TTL_VOLATILE)
+        problems = _problems_for(contest_id, html)
         if not problems:
             return MetadataResult(
                 success=False,
@@ -202,8 +244,7 @@ class CSESScraper(BaseScraper):
         )
 
     async def scrape_contest_list(self) -> ContestListResult:
-        async with httpx.AsyncClient() as client:
-            html = await fetch_text(client, INDEX_PATH)
+        html = await fetch_text(self._http_client(), INDEX_PATH, TTL_VOLATILE)
         cats = parse_categories(html)
         if not cats:
             return ContestListResult(
@@ -212,50 +253,37 @@ class CSESScraper(BaseScraper):
         return ContestListResult(success=True, error="", contests=cats)
 
     async def stream_tests_for_category_async(self, category_id: str) -> None:
-        async with httpx.AsyncClient(
-            limits=httpx.Limits(max_connections=CONNECTIONS)
-        ) as client:
-            index_html = await fetch_text(client, INDEX_PATH)
-            problems = parse_category_problems(category_id, index_html)
-            if not problems:
+        client = self._http_client()
+        index_html = await fetch_text(client, INDEX_PATH, TTL_VOLATILE)
+        problems = _problems_for(category_id, index_html)
+        if not problems:
+            raise ValueError(f"No problems found for category {category_id}")
+        writer = io_writer.get()
+        checkpoint = None
+        if category_id == ALL_CATEGORIES and writer is not None:
+            checkpoint = writer.checkpoint(f"cses-{ALL_CATEGORIES}")
+            problems = [p for p in problems if p.id not in checkpoint.done]
+        self._emit_manifest([p.id for p in problems])
+
+        async def run_one(pid: str) -> None:
+            try:
+                html = await fetch_text(client, task_path(pid))
+                with trace.span("parse", parser="regex"):
+                    tests = parse_tests(html)
+                    timeout_ms, memory_mb, interactive = _extract_problem_info(html)
+            except Exception as e:
+                self._emit_problem_error(pid, str(e))
                 return
 
-            sem = asyncio.Semaphore(CONNECTIONS)
-
-            async def run_one(pid: str) -> dict[str, Any]:
-                async with sem:
-                    try:
-                        html = await fetch_text(client, task_path(pid))
-                        tests = parse_tests(html)
-                        timeout_ms, memory_mb, interactive = _extract_problem_info(html)
-                    except Exception:
-                        tests = []
-                        timeout_ms, memory_mb, interactive = 0, 0, False
-
-                    combined_input = "\n".join(t.input for t in tests) if tests else ""
-                    combined_expected = (
-                        "\n".join(t.expected for t in tests) if tests else ""
-                    )
-
-                    return {
-                        "problem_id": pid,
-                        "combined": {
-                            "input": combined_input,
-                            "expected": combined_expected,
-                        },
-                        "tests": [
-                            {"input": t.input, "expected": t.expected} for t in tests
-                        ],
-                        "timeout_ms": timeout_ms,
-                        "memory_mb": memory_mb,
-                        "interactive": interactive,
-                        "multi_test": False,
-                    }
-
-            tasks = [run_one(p.id) for p in problems]
-            for coro in asyncio.as_completed(tasks):
-                payload = await coro
-                print(json.dumps(payload), flush=True)
+            emitted = self._emit_problem(
+                self._tests_payload(
+                    pid, tests, timeout_ms, memory_mb, interactive=interactive
+                )
+            )
+            if emitted and checkpoint is not None:
+                checkpoint.add(pid)
+
+        await asyncio.gather(*(run_one(p.id) for p in problems))
 
 
 if __name__ == "__main__":
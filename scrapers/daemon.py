@@ -0,0 +1,168 @@
+import asyncio
+import importlib
+import json
+import sys
+from collections.abc import Callable
+from typing import Any
+
+from . import trace
+from .base import BaseScraper, output_sink, write_stdout
+
+SCRAPERS = {
+    "atcoder": ("scrapers.atcoder", "AtcoderScraper"),
+    "codechef": ("scrapers.codechef", "CodeChefScraper"),
+    "codeforces": ("scrapers.codeforces", "CodeforcesScraper"),
+    "cses": ("scrapers.cses", "CSESScraper"),
+}
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class ScraperDaemon:
+    """Newline-delimited JSON-RPC 2.0 server over stdin/stdout.
+
+    A request names a CLI mode as its method and carries the platform and the
+    remaining CLI arguments as params:
+
+        {"jsonrpc": "2.0", "id": 1, "method": "tests",
+         "params": {"platform": "atcoder", "args": ["abc100"]}}
+
+    Every line the scraper would have printed is forwarded as an ``event``
+    notification tagged with the request id, followed by a response carrying
+    the exit code the CLI would have returned. Scraper instances (and their
+    HTTP clients) live for the lifetime of the daemon.
+    """
+
+    def __init__(self) -> None:
+        self._scrapers: dict[str, BaseScraper] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def _scraper(self, platform: str) -> BaseScraper:
+        scraper = self._scrapers.get(platform)
+        if scraper is None:
+            module_name, class_name = SCRAPERS[platform]
+            module = importlib.import_module(module_name)
+            scraper = getattr(module, class_name)()
+            self._scrapers[platform] = scraper
+        return scraper
+
+    def _write(self, line: bytes) -> None:
+        write_stdout(line + b"\n")
+
+    def _respond(self, req_id: Any, result: Any = None, error: Any = None) -> None:
+        msg: dict[str, Any] = {"jsonrpc": "2.0", "id": req_id}
+        if error is not None:
+            msg["error"] = error
+        else:
+            msg["result"] = result
+        self._write(json.dumps(msg).encode())
+
+    def _event_sink(self, req_id: Any) -> Callable[[bytes], None]:
+        prefix = b'{"jsonrpc":"2.0","method":"event","params":{"id":%s,"data":' % (
+            json.dumps(req_id).encode()
+        )
+
+        def sink(line: bytes) -> None:
+            self._write(prefix + line + b"}}")
+
+        return sink
+
+    async def _handle(self, req: dict[str, Any]) -> None:
+        req_id = req.get("id")
+        method = req.get("method")
+        params = req.get("params") or {}
+        args = params.get("args", []) if isinstance(params, dict) else None
+        if not isinstance(args, list) or not all(
+            isinstance(a, (str, int)) for a in args
+        ):
+            self._respond(
+                req_id,
+                error={
+                    "code": INVALID_PARAMS,
+                    "message": "params must be an object with an args list",
+                },
+            )
+            return
+
+        platform = params.get("platform")
+        if not isinstance(platform, str) or platform not in SCRAPERS:
+            self._respond(
+                req_id,
+                error={
+                    "code": METHOD_NOT_FOUND,
+                    "message": f"Unknown platform: {platform}",
+                },
+            )
+            return
+
+        args = [str(a) for a in args]
+        if "-" in args:
+            # stdin is the request stream here; batches pass their ids inline.
+            self._respond(
+                req_id,
+                error={"code": INVALID_PARAMS, "message": "Cannot read ids from stdin"},
+            )
+            return
+        output_sink.set(self._event_sink(req_id))
+        try:
+            scraper = self._scraper(platform)
+            code = await scraper._run_cli_async([platform, str(method), *args])
+        except Exception as e:
+            self._respond(req_id, error={"code": INTERNAL_ERROR, "message": str(e)})
+            return
+        self._respond(req_id, {"code": code})
+
+    def _dispatch(self, raw: bytes) -> bool:
+        try:
+            req = json.loads(raw)
+        except ValueError as e:
+            self._respond(None, error={"code": PARSE_ERROR, "message": str(e)})
+            return True
+        if not isinstance(req, dict) or "method" not in req:
+            self._respond(
+                None, error={"code": INVALID_REQUEST, "message": "Invalid request"}
+            )
+            return True
+        if req["method"] == "shutdown":
+            self._respond(req.get("id"), {"code": 0})
+            return False
+        task = asyncio.create_task(self._handle(req))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def serve(self) -> int:
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=2**24)
+        await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), sys.stdin
+        )
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                if raw.strip() and not self._dispatch(raw):
+                    break
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            for scraper in self._scrapers.values():
+                await scraper.aclose()
+        return 0
+
+
+def main() -> None:
+    # Only the environment variable enables tracing here: the daemon's
+    # requests carry no CLI flags of their own.
+    trace.start()
+    try:
+        sys.exit(asyncio.run(ScraperDaemon().serve()))
+    except KeyboardInterrupt:
+        sys.exit(130)
+    finally:
+        trace.stop()
@@ -0,0 +1,346 @@
+"""Shared HTTP plumbing: per-host rate limiting and retrying GETs.
+
+Every request a scraper sends first takes a token from the bucket of its
+host. Buckets refill at ``1 / ScraperConfig.rate_limit_delay`` tokens per
+second up to ``ScraperConfig.burst``, so bulk downloads stay at the allowed
+ceiling instead of tripping 429s and falling into backoff. Buckets are shared
+by every scraper instance, client and thread in the process.
+
+The number of requests in flight to a host is bounded by an
+:class:`AdaptiveLimiter`, shared the same way. It starts at
+``ScraperConfig.concurrency`` and adjusts to the server: each healthy
+response adds ``1 / limit`` (about one slot per round of requests), while a
+429 or 503, a transport error, or a p95 latency twice the best seen halves
+it. A slow or overloaded site is thus backed off within one round, and a
+fast one is driven up to ``ScraperConfig.max_concurrency``.
+"""
+
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from . import trace
+from .models import ScraperConfig
+
+if TYPE_CHECKING:
+    import httpx
+
+FATAL_STATUS = {400, 401, 403, 404, 410}
+OVERLOAD_STATUS = {429, 503}
+MAX_BACKOFF_S = 60.0
+# Healthy responses per p95 sample, and how far a sample may exceed the best
+# one seen before the concurrency limit is cut.
+LATENCY_WINDOW = 20
+LATENCY_FACTOR = 2.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it."""
+        if math.isinf(self.rate):
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def _waited(self, wait: float) -> None:
+        s = trace.current()
+        if s is not None:
+            s.add("queue_ms", wait * 1000)
+
+    async def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            self._waited(wait)
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            self._waited(wait)
+            time.sleep(wait)
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def host_limiter(url: str, config: ScraperConfig) -> TokenBucket:
+    """The bucket for ``url``'s host, created from ``config`` on first use."""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        bucket = _limiters.get(host)
+        if bucket is None:
+            delay = config.rate_limit_delay
+            rate = 1.0 / delay if delay > 0 else math.inf
+            bucket = TokenBucket(rate, config.burst)
+            _limiters[host] = bucket
+    return bucket
+
+
+@dataclass
+class Outcome:
+    """What became of a request sent under an :class:`AdaptiveLimiter` slot.
+
+    ``status`` stays None when no response arrived. ``sent`` is when the
+    request went out, for latency; a caller that waits for something else
+    after taking the slot moves it forward.
+    """
+
+    sent: float
+    status: int | None = None
+
+
+class AdaptiveLimiter:
+    """AIMD bound on the requests in flight to one host.
+
+    Waiters are admitted in arrival order, from the event loop or from
+    threads alike. Responses to requests sent before a cut cannot cut again,
+    so a burst of 429s from requests sent together counts once.
+    """
+
+    def __init__(self, initial: int, ceiling: int) -> None:
+        self.ceiling = max(1, ceiling)
+        self.limit = float(min(max(1, initial), self.ceiling))
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._waiters: deque[Callable[[], None]] = deque()
+        self._latencies: list[float] = []
+        self._best_p95: float | None = None
+        # Responses still due from requests sent before the last cut.
+        self._cooldown = 0
+
+    def _admit(self) -> list[Callable[[], None]]:
+        """Hand free slots to waiters; call with the lock held."""
+        woken: list[Callable[[], None]] = []
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            woken.append(self._waiters.popleft())
+        return woken
+
+    def _free_slot(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            woken = self._admit()
+        for wake in woken:
+            wake()
+
+    def _waited(self, start: float) -> None:
+        s = trace.current()
+        if s is not None:
+            s.add("queue_ms", (time.perf_counter() - start) * 1000)
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[None] = loop.create_future()
+
+        def grant() -> None:
+            # A waiter cancelled before its turn passes the slot on.
+            if fut.cancelled():
+                self._free_slot()
+            else:
+                fut.set_result(None)
+
+        def wake() -> None:
+            try:
+                loop.call_soon_threadsafe(grant)
+            except RuntimeError:  # loop closed
+                self._free_slot()
+
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            self._waiters.append(wake)
+        start = time.perf_counter()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if not fut.cancelled():  # the slot was granted regardless
+                self._free_slot()
+            raise
+        self._waited(start)
+
+    def acquire_sync(self) -> None:
+        event = threading.Event()
+        with self._lock:
+            if not self._waiters and self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return
+            self._waiters.append(event.set)
+        start = time.perf_counter()
+        event.wait()
+        self._waited(start)
+
+    def _cut(self) -> None:
+        self.limit = max(1.0, self.limit / 2)
+        self._cooldown = self.in_flight
+        self._latencies.clear()
+
+    def _healthy(self, elapsed: float) -> bool:
+        self._latencies.append(elapsed)
+        if len(self._latencies) < LATENCY_WINDOW:
+            return True
+        ordered = sorted(self._latencies)
+        self._latencies.clear()
+        p95 = ordered[int(0.95 * (len(ordered) - 1))]
+        best = self._best_p95
+        if best is None or p95 <= best:
+            self._best_p95 = p95
+            return True
+        if p95 <= LATENCY_FACTOR * best:
+            return True
+        # Raise the bar with the cut, so a site that stays this slow is
+        # not halved again; only latency that keeps rising is.
+        self._best_p95 = p95 / LATENCY_FACTOR
+        return False
+
+    def release(self, elapsed: float, status: int | None) -> None:
+        """Free a slot, adjusting the limit by how the request went."""
+        with self._lock:
+            self.in_flight -= 1
+            # A request sent before the last cut was answered by that cut.
+            stale = self._cooldown > 0
+            if stale:
+                self._cooldown -= 1
+            if status is None or status in OVERLOAD_STATUS:
+                overloaded = True
+            elif status < 400:
+                overloaded = not self._healthy(elapsed)
+                if not overloaded:
+                    self.limit = min(self.ceiling, self.limit + 1 / self.limit)
+            else:
+                overloaded = False
+            if overloaded and not stale:
+                self._cut()
+            woken = self._admit()
+        for wake in woken:
+            wake()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Outcome]:
+        await self.acquire()
+        outcome = Outcome(time.perf_counter())
+        try:
+            yield outcome
+        except asyncio.CancelledError:
+            # Says nothing about the server.
+            self._free_slot()
+            raise
+        except BaseException:
+            self.release(time.perf_counter() - outcome.sent, outcome.status)
+            raise
+        self.release(time.perf_counter() - outcome.sent, outcome.status)
+
+    @contextmanager
+    def slot_sync(self) -> Iterator[Outcome]:
+        self.acquire_sync()
+        outcome = Outcome(time.perf_counter())
+        try:
+            yield outcome
+        finally:
+            self.release(time.perf_counter() - outcome.sent, outcome.status)
+
+
+_concurrency: dict[str, AdaptiveLimiter] = {}
+
+
+def host_concurrency(url: str, config: ScraperConfig) -> AdaptiveLimiter:
+    """The concurrency limiter for ``url``'s host, created like its bucket."""
+    host = urlsplit(url).netloc
+    with _limiters_lock:
+        limiter = _concurrency.get(host)
+        if limiter is None:
+            limiter = AdaptiveLimiter(config.concurrency, config.max_concurrency)
+            _concurrency[host] = limiter
+    return limiter
+
+
+def retry_after(r: "httpx.Response") -> float | None:
+    value = r.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+async def get_with_retry(
+    client: "httpx.AsyncClient",
+    url: str,
+    config: ScraperConfig,
+    headers: dict[str, str],
+) -> "httpx.Response":
+    """Rate- and concurrency-limited GET with jittered exponential backoff.
+
+    Transport errors and non-fatal error statuses are retried up to
+    ``config.max_retries`` times; a ``Retry-After`` header takes precedence
+    over the computed delay.
+    """
+    import httpx
+
+    bucket = host_limiter(url, config)
+    limiter = host_concurrency(url, config)
+    span = trace.current()
+    for attempt in range(config.max_retries + 1):
+        cap = min(MAX_BACKOFF_S, config.backoff_base * 2**attempt)
+        delay = random.uniform(0, cap)
+        if span is not None:
+            span.set(retries=attempt)
+        start = time.perf_counter()
+        try:
+            async with limiter.slot() as outcome:
+                await bucket.acquire()
+                start = outcome.sent = time.perf_counter()
+                r = await client.get(
+                    url,
+                    headers=headers,
+                    timeout=config.timeout_seconds,
+                    extensions=trace.http_extensions(span),
+                )
+                outcome.status = r.status_code
+        except httpx.TransportError:
+            # Timeouts of every kind, dropped connections and protocol errors.
+            if attempt == config.max_retries:
+                raise
+        else:
+            if r.status_code < 400:
+                return r
+            if r.status_code in FATAL_STATUS or attempt == config.max_retries:
+                r.raise_for_status()
+            ra = retry_after(r)
+            if ra is not None:
+                delay = min(ra, MAX_BACKOFF_S)
+        finally:
+            if span is not None:
+                span.add("network_ms", (time.perf_counter() - start) * 1000)
+        if span is not None:
+            span.add("backoff_ms", delay * 1000)
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
@@ -0,0 +1,230 @@
+"""Single-flight for identical scraper runs, across processes.
+
+A run takes an exclusive ``flock`` on a lock file named after its platform
+and arguments, and copies every line it emits to a spool file. A run with
+the same arguments that finds the lock held does not scrape: it replays the
+spool as it grows and exits with the first run's exit code. Should the first
+run die before finishing, a waiting run takes over and scrapes itself,
+holding back the lines its client already got from the replay.
+
+Only runs that overlap in time share a result; a request made after the
+first run has finished always scrapes afresh. A leader removes its spool and
+lock file when it is done, so finished flights leave nothing behind.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import IO
+
+try:
+    import fcntl
+except ImportError:  # no flock: every run scrapes on its own
+    fcntl = None  # type: ignore[assignment]
+
+from .cache import cache_dir
+
+FLIGHTS_DIR = "flights"
+POLL_SECONDS = 0.05
+# Last line of a finished spool; never forwarded to a consumer.
+EXIT_PREFIX = b'{"single_flight_exit":'
+
+_spool: ContextVar[IO[bytes] | None] = ContextVar("flight_spool", default=None)
+# Lines replayed to this run's client before it had to scrape itself.
+_replayed: ContextVar["Counter[bytes] | None"] = ContextVar(
+    "flight_replayed", default=None
+)
+
+
+def record(line: bytes) -> bool:
+    """Copy an emitted line to the spool of the run leading this flight.
+
+    False when the client already has the line from an earlier replay.
+    """
+    spool = _spool.get()
+    if spool is not None:
+        spool.write(line + b"\n")
+        spool.flush()
+    replayed = _replayed.get()
+    if replayed and replayed[line] > 0:
+        replayed[line] -= 1
+        return False
+    return True
+
+
+def _key(platform: str, args: list[str]) -> str:
+    raw = json.dumps([platform, *args]).encode()
+    return hashlib.sha256(raw).hexdigest()[:32]
+
+
+def _try_lock(lock: IO[bytes]) -> bool:
+    try:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return False
+    return True
+
+
+def _same_file(lock: IO[bytes], path: Path) -> bool:
+    """Whether ``lock`` is still the file at ``path``, not one unlinked since."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(lock.fileno())
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+
+def _writer_alive(name: bytes) -> bool:
+    """Whether the process named in a spool file name is still running."""
+    try:
+        pid = int(name.split(b".")[1].split(b"-")[0])
+        os.kill(pid, 0)
+    except (IndexError, ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _open_lock(root: Path, lock_path: Path) -> IO[bytes]:
+    root.mkdir(parents=True, exist_ok=True)
+    return open(lock_path, "a+b")
+
+
+def _open_spool(root: Path, key: str) -> tuple[Path, IO[bytes]]:
+    # Spools of leaders killed before they could clean up.
+    for old in root.glob(f"{key}.*.spool"):
+        old.unlink(missing_ok=True)
+    spool_path = root / f"{key}.{os.getpid()}-{time.monotonic_ns()}.spool"
+    return spool_path, open(spool_path, "wb")
+
+
+def _remove(*paths: Path) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _leader_gone(lock: IO[bytes]) -> bool:
+    if not _try_lock(lock):
+        return False
+    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    return True
+
+
+async def _lead(
+    root: Path,
+    key: str,
+    lock_path: Path,
+    lock: IO[bytes],
+    run: Callable[[], Awaitable[int]],
+) -> int:
+    lock.seek(0)
+    lock.truncate()
+    lock.flush()
+    spool_path, spool = await asyncio.to_thread(_open_spool, root, key)
+    try:
+        with spool:
+            lock.write(spool_path.name.encode())
+            lock.flush()
+            token = _spool.set(spool)
+            try:
+                code = await run()
+            finally:
+                _spool.reset(token)
+            # Only a run that finished hands its exit code on; otherwise the
+            # followers notice the lock is free and scrape themselves.
+            spool.write(EXIT_PREFIX + str(code).encode() + b"}\n")
+            spool.flush()
+    finally:
+        # Followers keep reading through their open handles. The lock file
+        # goes while still locked, so nobody can lead a finished flight.
+        # Two unlinks, done inline so that a cancelled run still does them.
+        _remove(spool_path, lock_path)
+    return code
+
+
+async def _follow(
+    root: Path,
+    lock: IO[bytes],
+    emit: Callable[[bytes], None],
+    replayed: Counter[bytes],
+) -> int | None:
+    """Replay the leader's spool; None if it ended without an exit code."""
+    name = b""
+    while not name:
+        # The lock file holds one spool file name, so reading it inline is
+        # cheap; the spool itself can be megabytes and is read in a thread.
+        lock.seek(0)
+        name = lock.read().strip()
+        if name and not _writer_alive(name):
+            # Left by a leader that was killed; its successor has the lock
+            # and is about to replace it.
+            name = b""
+        if not name:
+            if _leader_gone(lock):
+                return None
+            await asyncio.sleep(POLL_SECONDS)
+    try:
+        spool = await asyncio.to_thread(open, root / name.decode(), "rb")
+    except FileNotFoundError:
+        return None
+    with spool:
+        pending = b""
+        last_look = False
+        while True:
+            chunk = await asyncio.to_thread(spool.read)
+            if chunk:
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    if line.startswith(EXIT_PREFIX):
+                        return int(json.loads(line)["single_flight_exit"])
+                    emit(line)
+                    replayed[line] += 1
+                continue
+            if last_look:
+                return None
+            # The exit line is written before the lock is released, so one
+            # more read after the leader is gone finds it if it is there.
+            last_look = _leader_gone(lock)
+            if not last_look:
+                await asyncio.sleep(POLL_SECONDS)
+
+
+async def single_flight(
+    platform: str,
+    args: list[str],
+    run: Callable[[], Awaitable[int]],
+    emit: Callable[[bytes], None],
+) -> int:
+    """``run()`` unless an identical run is in flight; then replay its output."""
+    if fcntl is None:
+        return await run()
+    root = cache_dir() / FLIGHTS_DIR
+    key = _key(platform, args)
+    lock_path = root / f"{key}.lock"
+    replayed: Counter[bytes] = Counter()
+    token = _replayed.set(replayed)
+    try:
+        while True:
+            try:
+                lock = await asyncio.to_thread(_open_lock, root, lock_path)
+            except OSError:
+                return await run()
+            with lock:
+                if not _try_lock(lock):
+                    code = await _follow(root, lock, emit, replayed)
+                    if code is not None:
+                        return code
+                elif _same_file(lock, lock_path):
+                    return await _lead(root, key, lock_path, lock, run)
+                # Otherwise the flight this file belonged to is over; closing
+                # it drops the lock, and the next turn opens the current one.
+    finally:
+        _replayed.reset(token)
@@ -0,0 +1,128 @@
+"""Sample files written by the scraper itself for ``tests --write-io``.
+
+Each sample of a problem becomes ``<dir>/<name>.<n>.cpin`` and
+``<dir>/<name>.<n>.cpout``, where ``<name>`` is the ``--name-template``
+formatted with ``contest_id`` and ``problem_id``. The ``!l`` conversion
+lowercases a field, so the default ``{contest_id!l}{problem_id!l}`` matches
+the plugin's default file names. Files are written to a temporary name and
+renamed into place, so a reader never sees a half-written sample.
+
+Long runs can keep a :class:`Checkpoint` beside the files, listing the
+problems whose samples are complete, so an interrupted run picks up where
+it stopped.
+"""
+
+import json
+import os
+import string
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .models import TestCase
+
+WRITE_IO_FLAG = "--write-io"
+NAME_TEMPLATE_FLAG = "--name-template"
+DEFAULT_TEMPLATE = "{contest_id!l}{problem_id!l}"
+
+
+class _NameFormatter(string.Formatter):
+    def convert_field(self, value: Any, conversion: str | None) -> Any:
+        if conversion == "l":
+            return str(value).lower()
+        return super().convert_field(value, conversion)
+
+
+_names = _NameFormatter()
+
+
+def pop_flags(args: list[str]) -> tuple[list[str], "IOWriter | None"]:
+    """Strip ``--write-io DIR`` and ``--name-template T`` from ``args``."""
+    values: dict[str, str] = {}
+    rest: list[str] = []
+    it = iter(args)
+    for arg in it:
+        flag, eq, value = arg.partition("=")
+        if flag in (WRITE_IO_FLAG, NAME_TEMPLATE_FLAG):
+            values[flag] = value if eq else next(it, "")
+        else:
+            rest.append(arg)
+    root = values.get(WRITE_IO_FLAG)
+    if not root:
+        return rest, None
+    template = values.get(NAME_TEMPLATE_FLAG) or DEFAULT_TEMPLATE
+    return rest, IOWriter(Path(root).resolve(), template)
+
+
+def write_atomic(path: Path, data: str) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _file_text(sample: str) -> str:
+    # The same bytes the plugin wrote itself: one newline-terminated line per
+    # line of the sample, carriage returns dropped.
+    return sample.replace("\r", "") + "\n"
+
+
+class Checkpoint:
+    """Problems whose samples are on disk, saved after every addition.
+
+    A checkpoint written with a different name template is ignored, since
+    the files it vouches for would have other names.
+    """
+
+    def __init__(self, path: Path, template: str) -> None:
+        self.path = path
+        self.template = template
+        self.done: set[str] = set()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("template") == template:
+            self.done = {str(pid) for pid in data.get("done", [])}
+
+    def add(self, problem_id: str) -> None:
+        self.done.add(problem_id)
+        data = {"template": self.template, "done": sorted(self.done)}
+        write_atomic(self.path, json.dumps(data))
+
+
+@dataclass(frozen=True)
+class IOWriter:
+    root: Path
+    template: str
+    contest_id: str = ""
+
+    def checkpoint(self, name: str) -> Checkpoint:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return Checkpoint(self.root / f".{name}.checkpoint.json", self.template)
+
+    def name(self, problem_id: str) -> str:
+        return _names.format(
+            self.template, contest_id=self.contest_id, problem_id=problem_id
+        )
+
+    def write(self, problem_id: str, tests: list[TestCase]) -> list[dict[str, str]]:
+        """Write one problem's samples, returning their paths in order."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        stem = self.name(problem_id)
+        if not stem or os.sep in stem:
+            raise ValueError(f"Bad file name {stem!r} for problem {problem_id}")
+        paths: list[dict[str, str]] = []
+        for i, t in enumerate(tests, 1):
+            input_path = self.root / f"{stem}.{i}.cpin"
+            expected_path = self.root / f"{stem}.{i}.cpout"
+            write_atomic(input_path, _file_text(t.input))
+            write_atomic(expected_path, _file_text(t.expected))
+            paths.append(
+                {"input_path": str(input_path), "expected_path": str(expected_path)}
+            )
+        return paths
@@ -5,21 +5,21 @@ class TestCase(BaseModel):
     input: str
     expected: str
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class CombinedTest(BaseModel):
     input: str
     expected: str
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class ProblemSummary(BaseModel):
     id: str
     name: str
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class ContestSummary(BaseModel):
@@ -27,14 +27,14 @@ class ContestSummary(BaseModel):
     name: str
     display_name: str | None = None
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class ScrapingResult(BaseModel):
     success: bool
     error: str
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class MetadataResult(ScrapingResult):
@@ -42,13 +42,13 @@ class MetadataResult(ScrapingResult):
     problems: list[ProblemSummary] = Field(default_factory=list)
     url: str
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class ContestListResult(ScrapingResult):
     contests: list[ContestSummary] = Field(default_factory=list)
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class TestsResult(ScrapingResult):
@@ -60,7 +60,7 @@ class TestsResult(ScrapingResult):
     interactive: bool = False
     multi_test: bool = False
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
 
 
 class ScraperConfig(BaseModel):
@@ -68,5 +68,10 @@ class ScraperConfig(BaseModel):
     max_retries: int = 3
     backoff_base: float = 2.0
     rate_limit_delay: float = 1.0
+    burst: int = 1
+    # Requests in flight per host: where the adaptive limit starts, and the
+    # most it may grow to.
+    concurrency: int = 4
+    max_concurrency: int = 16
 
-    model_config = ConfigDict(extra="forbid")
+    model_config = ConfigDict(extra="forbid", defer_build=True)
@@ -0,0 +1,42 @@
+"""Single entry point for building BeautifulSoup trees.
+
+Scrapers build exactly one tree per fetched page and hand it to every
+extractor. The tree uses lxml when it is importable (scrapling already
+depends on it), which is faster than the pure-Python ``html.parser`` on every
+fixture page; ``CP_SCRAPER_HTML_PARSER`` forces a specific backend.
+"""
+
+import functools
+import importlib.util
+import os
+from typing import TYPE_CHECKING
+
+from . import trace
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+PARSER_ENV = "CP_SCRAPER_HTML_PARSER"
+FALLBACK_PARSER = "html.parser"
+
+
+@functools.cache
+def default_parser() -> str:
+    override = os.environ.get(PARSER_ENV)
+    if override:
+        return override
+    return "lxml" if importlib.util.find_spec("lxml") else FALLBACK_PARSER
+
+
+def make_soup(
+    html: str,
+    parser: str | None = None,
+    parse_only: "SoupStrainer | None" = None,
+) -> "BeautifulSoup":
+    from bs4 import BeautifulSoup
+
+    parser = parser or default_parser()
+    with trace.span("parse", parser=parser) as span:
+        if span is not None:
+            span.set(bytes=len(html.encode()))
+        return BeautifulSoup(html, parser, parse_only=parse_only)
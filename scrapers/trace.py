@@ -0,0 +1,233 @@
+"""Opt-in per-request tracing of scraper runs.
+
+Enabled with ``--trace`` (spans on stderr), ``--trace=FILE``, or the
+``CP_SCRAPER_TRACE`` environment variable set to ``-`` or a file path. Every
+fetch and every HTML parse becomes one NDJSON span:
+
+    {"event": "span", "kind": "fetch", "url": "...", "start_ms": 12.0,
+     "total_ms": 183.4, "cache": "miss", "queue_ms": 40.1, "connect_ms": 31.0,
+     "tls_ms": 52.3, "server_ms": 48.9, "network_ms": 141.2, "backoff_ms": 0,
+     "retries": 0, "status": 200, "bytes": 51234}
+
+``queue_ms`` is time spent waiting for a concurrency slot or a rate-limit
+token; ``connect_ms`` includes DNS resolution; ``server_ms`` is the time to
+the response headers. When the run ends a ``summary`` event closes the trace
+and a table of per-phase totals and percentiles is printed on stderr.
+
+Tracing costs one ContextVar lookup per fetch when disabled.
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import IO, Any
+
+TRACE_ENV = "CP_SCRAPER_TRACE"
+TRACE_FLAG = "--trace"
+STDERR = "-"
+
+# httpcore trace steps worth reporting, by the field they are summed into.
+HTTP_STEPS = {
+    "connect_tcp": "connect_ms",
+    "start_tls": "tls_ms",
+    "receive_response_headers": "server_ms",
+}
+SUMMARY_FIELDS = (
+    "queue_ms",
+    "connect_ms",
+    "tls_ms",
+    "server_ms",
+    "network_ms",
+    "backoff_ms",
+)
+
+
+class Span:
+    def __init__(self, kind: str, fields: dict[str, Any]) -> None:
+        self.kind = kind
+        self.fields = fields
+        self.start = time.perf_counter()
+
+    def add(self, key: str, ms: float) -> None:
+        self.fields[key] = round(self.fields.get(key, 0) + ms, 3)
+
+    def set(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+
+class Tracer:
+    def __init__(self, out: IO[str], owned: bool) -> None:
+        self._out = out
+        self._owned = owned
+        self._lock = threading.Lock()
+        self._spans: list[dict[str, Any]] = []
+        self.start = time.perf_counter()
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self._out.write(json.dumps(record) + "\n")
+        self._out.flush()
+
+    def record(self, span: Span) -> None:
+        now = time.perf_counter()
+        record = {
+            "event": "span",
+            "kind": span.kind,
+            **span.fields,
+            "start_ms": round((span.start - self.start) * 1000, 3),
+            "total_ms": round((now - span.start) * 1000, 3),
+        }
+        with self._lock:
+            self._spans.append(record)
+            self._write(record)
+
+    def summary(self) -> dict[str, Any]:
+        fetches = [s for s in self._spans if s["kind"] == "fetch"]
+        phases: dict[str, list[float]] = {
+            key: [s[key] for s in fetches if key in s] for key in SUMMARY_FIELDS
+        }
+        phases["parse_ms"] = [
+            s["total_ms"] for s in self._spans if s["kind"] == "parse"
+        ]
+        return {
+            "event": "summary",
+            "wall_ms": round((time.perf_counter() - self.start) * 1000, 3),
+            "fetches": len(fetches),
+            "cache_hits": sum(s.get("cache") == "hit" for s in fetches),
+            "errors": sum("error" in s for s in self._spans),
+            "retries": sum(s.get("retries", 0) for s in fetches),
+            "bytes": sum(s.get("bytes", 0) for s in fetches),
+            "phases": {k: _stats(v) for k, v in phases.items() if v},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            summary = self.summary()
+            self._write(summary)
+            if self._owned:
+                self._out.close()
+        print(format_summary(summary), file=sys.stderr, flush=True)
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "total": round(sum(ordered), 3),
+        "p50": round(statistics.median(ordered), 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+def format_summary(summary: dict[str, Any]) -> str:
+    lines = [
+        (
+            f"trace: {summary['fetches']} fetches ({summary['cache_hits']} cached), "
+            f"{summary['retries']} retries, {summary['errors']} errors, "
+            f"{summary['bytes'] / 1024:.1f} KiB in {summary['wall_ms']:.0f} ms"
+        ),
+        (
+            f"{'phase':<12}{'n':>6}{'total ms':>12}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'max ms':>10}"
+        ),
+    ]
+    for name, s in summary["phases"].items():
+        lines.append(
+            f"{name:<12}{s['n']:>6}{s['total']:>12.1f}{s['p50']:>10.1f}"
+            f"{s['p95']:>10.1f}{s['max']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+_tracer: Tracer | None = None
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+# URL of the task's last fetch, so parse spans say which page they parsed.
+_last_url: ContextVar[str | None] = ContextVar("trace_last_url", default=None)
+
+
+def pop_flag(args: list[str]) -> tuple[list[str], str | None]:
+    """Strip ``--trace[=FILE]`` from ``args``, returning where to trace to."""
+    dest: str | None = None
+    rest: list[str] = []
+    for arg in args:
+        if arg == TRACE_FLAG:
+            dest = STDERR
+        elif arg.startswith(TRACE_FLAG + "="):
+            dest = arg.split("=", 1)[1] or STDERR
+        else:
+            rest.append(arg)
+    return rest, dest
+
+
+def start(dest: str | None = None) -> None:
+    """Start tracing to ``dest``, or to ``CP_SCRAPER_TRACE`` when it is unset."""
+    global _tracer
+    dest = dest or os.environ.get(TRACE_ENV)
+    if not dest or _tracer is not None:
+        return
+    if dest in (STDERR, "1"):
+        _tracer = Tracer(sys.stderr, owned=False)
+    else:
+        _tracer = Tracer(open(dest, "w", encoding="utf-8"), owned=True)
+
+
+def stop() -> None:
+    global _tracer
+    if _tracer is not None:
+        tracer, _tracer = _tracer, None
+        tracer.close()
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+@contextmanager
+def span(kind: str, **fields: Any) -> Iterator[Span | None]:
+    tracer = _tracer
+    if tracer is None:
+        yield None
+        return
+    if kind == "fetch":
+        _last_url.set(fields.get("url"))
+    else:
+        fields.setdefault("url", _last_url.get())
+    s = Span(kind, fields)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.set(error=str(e) or type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        tracer.record(s)
+
+
+def current() -> Span | None:
+    return _current.get() if _tracer is not None else None
+
+
+def http_extensions(s: Span | None) -> dict[str, Any]:
+    """httpx request extensions that time connect, TLS and server phases."""
+    if s is None:
+        return {}
+    started: dict[str, float] = {}
+
+    async def hook(event: str, info: dict[str, Any]) -> None:
+        step, _, phase = event.rpartition(".")
+        step = step.rpartition(".")[2]
+        if step not in HTTP_STEPS:
+            return
+        if phase == "started":
+            started[step] = time.perf_counter()
+        elif phase in ("complete", "failed") and step in started:
+            s.add(HTTP_STEPS[step], (time.perf_counter() - started.pop(step)) * 1000)
+
+    return {"trace": hook}
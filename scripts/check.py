@@ -0,0 +1,289 @@
+"""Compare a solution's output against the expected answer.
+
+Both sides are memory-mapped and read a block at a time, so memory stays
+constant however large the outputs are. Four modes are supported:
+
+- ``exact``: the bytes must be identical.
+- ``lines``: the lines must be identical once carriage returns are dropped,
+  each line is trimmed and blank lines are skipped; the plugin's own check.
+- ``whitespace``: the whitespace-separated tokens must be identical; line
+  breaks, indentation and blank lines are ignored.
+- ``float``: like ``whitespace``, but tokens that differ are accepted when
+  both parse as numbers within ``--abs-eps`` or ``--rel-eps`` of each other.
+
+The verdict is printed as one JSON line, with the first mismatch located by
+byte offset and line in both files:
+
+    {"ok": false, "offset": 10, "line": 2, "expected_offset": 10,
+     "expected_line": 2, "expected": "4", "actual": "5"}
+
+    python check.py EXPECTED ACTUAL [--mode MODE] [--abs-eps E] [--rel-eps E]
+"""
+
+import argparse
+import json
+import math
+import mmap
+import re
+import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass
+from itertools import compress, count, zip_longest
+from operator import ne, sub
+from typing import Any
+
+BLOCK = 1 << 20
+MODES = ("exact", "lines", "whitespace", "float")
+DEFAULT_EPS = 1e-6
+_TOKEN = re.compile(rb"\S+")
+_SPACE = re.compile(rb"\s")
+
+# bytes, mmap or anything else that slices to bytes.
+Buffer = Any
+
+
+@dataclass
+class Mismatch:
+    offset: int
+    line: int
+    expected_offset: int
+    expected_line: int
+    expected: str | None
+    actual: str | None
+
+
+def _line_of(buf: Buffer, offset: int) -> int:
+    lines = 1
+    for start in range(0, offset, BLOCK):
+        lines += buf[start : min(start + BLOCK, offset)].count(b"\n")
+    return lines
+
+
+def _mismatch(
+    expected: Buffer,
+    actual: Buffer,
+    expected_at: int,
+    actual_at: int,
+    expected_token: bytes | None,
+    actual_token: bytes | None,
+) -> Mismatch:
+    def text(token: bytes | None) -> str | None:
+        return None if token is None else token.decode("utf-8", errors="replace")
+
+    return Mismatch(
+        offset=actual_at,
+        line=_line_of(actual, actual_at),
+        expected_offset=expected_at,
+        expected_line=_line_of(expected, expected_at),
+        expected=text(expected_token),
+        actual=text(actual_token),
+    )
+
+
+def _first_difference(a: bytes, b: bytes) -> int:
+    """Index of the first differing byte of two unequal blocks."""
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if a[lo : mid + 1] == b[lo : mid + 1]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _compare_exact(expected: Buffer, actual: Buffer) -> Mismatch | None:
+    size = max(len(expected), len(actual))
+    for start in range(0, size, BLOCK):
+        a = expected[start : start + BLOCK]
+        b = actual[start : start + BLOCK]
+        if a != b:
+            at = start + _first_difference(a, b)
+            return _mismatch(
+                expected,
+                actual,
+                at,
+                at,
+                expected[at : at + 1] or None,
+                actual[at : at + 1] or None,
+            )
+    return None
+
+
+def _lines(buf: Buffer) -> Iterator[tuple[int, bytes]]:
+    """Offset and trimmed text of each non-blank line, a block at a time."""
+    pos, size = 0, len(buf)
+    while pos < size:
+        end = min(pos + BLOCK, size)
+        if end < size:
+            # Never cut a line in half: extend past the next newline.
+            nl = buf.find(b"\n", end)
+            end = size if nl < 0 else nl + 1
+        at = pos
+        for line in buf[pos:end].split(b"\n"):
+            text = line.replace(b"\r", b"").strip()
+            if text:
+                yield at + len(line) - len(line.lstrip()), text
+            at += len(line) + 1
+        pos = end
+
+
+def _compare_lines(expected: Buffer, actual: Buffer) -> Mismatch | None:
+    for want, got in zip_longest(_lines(expected), _lines(actual)):
+        if want is None or got is None or want[1] != got[1]:
+            want_at, want_text = want or (len(expected), None)
+            got_at, got_text = got or (len(actual), None)
+            return _mismatch(expected, actual, want_at, got_at, want_text, got_text)
+    return None
+
+
+class _Tokens:
+    """Whitespace-separated tokens of a buffer, split a block at a time."""
+
+    def __init__(self, buf: Buffer) -> None:
+        self.buf = buf
+        self.start = 0
+        self.end = 0
+        self.tokens: list[bytes] = []
+        self.i = 0
+
+    def fill(self) -> bool:
+        """Ensure unread tokens are buffered; False once the input is done."""
+        while self.i >= len(self.tokens):
+            if self.end >= len(self.buf):
+                return False
+            self.start = self.end
+            self.end = min(self.start + BLOCK, len(self.buf))
+            if self.end < len(self.buf):
+                # Never cut a token in half: extend to the next whitespace.
+                m = _SPACE.search(self.buf, self.end)
+                self.end = m.start() if m else len(self.buf)
+            self.tokens = self.buf[self.start : self.end].split()
+            self.i = 0
+        return True
+
+    def offset(self) -> int:
+        """Byte offset of the next unread token, or the end of the input."""
+        if self.i >= len(self.tokens):
+            return len(self.buf)
+        matches = _TOKEN.finditer(self.buf, self.start, self.end)
+        for _ in range(self.i):
+            next(matches)
+        return next(matches).start()
+
+
+def _close(a: bytes, b: bytes, abs_eps: float, rel_eps: float) -> bool:
+    try:
+        x, y = float(a), float(b)
+    except ValueError:
+        return False
+    diff = abs(x - y)
+    return diff <= abs_eps or diff <= rel_eps * abs(x)
+
+
+def _suspects(
+    a: list[bytes], b: list[bytes], tolerant: bool, abs_eps: float
+) -> Iterable[int]:
+    """Positions where two token runs may disagree, found at C speed."""
+    differ = compress(count(), map(ne, a, b))
+    if not tolerant:
+        return differ
+    # A run of numbers that all agree within abs_eps is cleared in one pass;
+    # anything else is checked token by token.
+    try:
+        gaps = list(map(abs, map(sub, map(float, a), map(float, b))))
+    except ValueError:
+        return differ
+    if max(gaps) <= abs_eps and not math.isnan(sum(gaps)):
+        return ()
+    return differ
+
+
+def _compare_tokens(
+    expected: Buffer,
+    actual: Buffer,
+    tolerant: bool,
+    abs_eps: float,
+    rel_eps: float,
+) -> Mismatch | None:
+    want, got = _Tokens(expected), _Tokens(actual)
+    while True:
+        more_want, more_got = want.fill(), got.fill()
+        if not (more_want and more_got):
+            if more_want or more_got:
+                return _mismatch(
+                    expected,
+                    actual,
+                    want.offset(),
+                    got.offset(),
+                    want.tokens[want.i] if more_want else None,
+                    got.tokens[got.i] if more_got else None,
+                )
+            return None
+        n = min(len(want.tokens) - want.i, len(got.tokens) - got.i)
+        a = want.tokens[want.i : want.i + n]
+        b = got.tokens[got.i : got.i + n]
+        if a != b:
+            for k in _suspects(a, b, tolerant, abs_eps):
+                if a[k] == b[k] or (tolerant and _close(a[k], b[k], abs_eps, rel_eps)):
+                    continue
+                want.i += k
+                got.i += k
+                return _mismatch(
+                    expected, actual, want.offset(), got.offset(), a[k], b[k]
+                )
+        want.i += n
+        got.i += n
+
+
+def compare(
+    expected: Buffer,
+    actual: Buffer,
+    mode: str = "whitespace",
+    abs_eps: float = DEFAULT_EPS,
+    rel_eps: float = DEFAULT_EPS,
+) -> Mismatch | None:
+    """The first mismatch between two outputs, or None when they agree."""
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    if mode == "exact" or len(expected) == len(actual):
+        first = _compare_exact(expected, actual)
+        if first is None or mode == "exact":
+            return first
+    if mode == "lines":
+        return _compare_lines(expected, actual)
+    return _compare_tokens(expected, actual, mode == "float", abs_eps, rel_eps)
+
+
+def _map(path: str) -> Buffer:
+    with open(path, "rb") as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return b""
+    buf.madvise(mmap.MADV_SEQUENTIAL)
+    return buf
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("expected")
+    parser.add_argument("actual")
+    parser.add_argument("--mode", choices=MODES, default="whitespace")
+    parser.add_argument("--abs-eps", type=float, default=DEFAULT_EPS)
+    parser.add_argument("--rel-eps", type=float, default=DEFAULT_EPS)
+    args = parser.parse_args()
+
+    first = compare(
+        _map(args.expected), _map(args.actual), args.mode, args.abs_eps, args.rel_eps
+    )
+    result: dict[str, Any] = {"ok": first is None}
+    if first is not None:
+        result.update(asdict(first))
+    print(json.dumps(result))
+    return 0 if first is None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,58 +1,315 @@
 #!/usr/bin/env python3
-import asyncio
+"""Relay stdin/stdout between an interactor and a solution.
+
+Each direction is copied in chunks straight from one pipe to the other as
+soon as bytes are available, so query-heavy problems are not throttled by
+per-line reads and flushes. The dialogue is echoed to the terminal, or with
+``--transcript FILE`` written to a file instead.
+
+The solution runs under the problem's limits: ``--timeout-ms`` caps its CPU
+time (RLIMIT_CPU) and, with some slack for waiting on the interactor, the
+wall time of the session; ``--memory-mb`` caps its address space
+(RLIMIT_AS) and its resident set, which is sampled while it runs. When no
+bytes move and neither process uses CPU for ``--idle-timeout-ms``, both
+sides are waiting on each other and the session is killed.
+
+On exit, per-process wall time, CPU time and peak memory are reported on
+stderr, followed by one JSON verdict line:
+
+    {"verdict": "AC", "reason": "", "interactor": {...}, "solution": {...}}
+
+with verdict one of AC, WA (rejected by the interactor), TLE, MLE, RE and
+IDLE.
+"""
+
+import argparse
+import json
+import os
+import resource
 import shlex
+import signal
+import subprocess
 import sys
-from collections.abc import Sequence
-
-
-async def pump(
-    reader: asyncio.StreamReader, writer: asyncio.StreamWriter | None
-) -> None:
-    while True:
-        data = await reader.readline()
-        if not data:
-            break
-        _ = sys.stdout.buffer.write(data)
-        _ = sys.stdout.flush()
-        if writer:
-            writer.write(data)
-            await writer.drain()
-
-
-async def main(interactor_cmd: Sequence[str], interactee_cmd: Sequence[str]) -> None:
-    interactor = await asyncio.create_subprocess_exec(
-        *interactor_cmd,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-    )
-    interactee = await asyncio.create_subprocess_exec(
-        *interactee_cmd,
-        stdin=asyncio.subprocess.PIPE,
-        stdout=asyncio.subprocess.PIPE,
-    )
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from typing import Any, BinaryIO
+
+CHUNK = 1 << 16
+POLL_S = 0.01
+# The solution may legitimately block on the interactor, so the session gets
+# more wall time than the CPU limit.
+WALL_SLACK = 2.0
+WALL_GRACE_MS = 1000
+DEFAULT_IDLE_TIMEOUT_MS = 5000
+MLE_FRACTION = 0.9
+# ru_maxrss is KiB on Linux and bytes on macOS.
+MAXRSS_TO_MB = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+PAGE_MB = os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+@dataclass
+class ProcStats:
+    name: str
+    code: int
+    signal: str | None
+    wall_ms: float
+    cpu_ms: float
+    peak_mb: float
+
+    def describe(self) -> str:
+        return (
+            f"{self.name}: exit {self.code}, wall {self.wall_ms:.1f} ms, "
+            f"cpu {self.cpu_ms:.1f} ms, peak {self.peak_mb:.1f} MB"
+        )
+
+
+@dataclass
+class Limits:
+    timeout_ms: int = 0
+    memory_mb: float = 0
+    idle_timeout_ms: int = DEFAULT_IDLE_TIMEOUT_MS
+
+    @property
+    def wall_ms(self) -> float:
+        if self.timeout_ms <= 0:
+            return 0
+        return self.timeout_ms * WALL_SLACK + WALL_GRACE_MS
+
+    def apply(self) -> None:
+        """Set the solution's rlimits; runs in the child before exec."""
+        if self.memory_mb > 0:
+            as_bytes = int(self.memory_mb * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (as_bytes, as_bytes))
+        if self.timeout_ms > 0:
+            cpu_s = -(-self.timeout_ms // 1000)
+            resource.setrlimit(resource.RLIMIT_CPU, (cpu_s, cpu_s + 1))
+
+
+class Echo:
+    """Serialises the echoed dialogue from both relay threads."""
+
+    def __init__(self, out: BinaryIO, flush: bool) -> None:
+        self._out = out
+        self._flush = flush
+        self._lock = threading.Lock()
+        self.last_activity = time.monotonic()
+
+    def write(self, data: bytes) -> None:
+        with self._lock:
+            self.last_activity = time.monotonic()
+            self._out.write(data)
+            if self._flush:
+                self._out.flush()
 
+    def close(self) -> None:
+        with self._lock:
+            self._out.flush()
+
+
+def pump(src: int, dst: int, echo: Echo) -> None:
+    try:
+        while data := os.read(src, CHUNK):
+            echo.write(data)
+            view = memoryview(data)
+            while view:
+                view = view[os.write(dst, view) :]
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        os.close(dst)
+
+
+def sample(pid: int) -> tuple[int, float] | None:
+    """CPU ticks and resident MB of a live process, where /proc exists."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            resident = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return int(fields[11]) + int(fields[12]), resident * PAGE_MB
+
+
+class Child:
+    def __init__(
+        self, name: str, cmd: Sequence[str], preexec: Callable[[], None] | None
+    ) -> None:
+        self.name = name
+        self.start = time.monotonic()
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            preexec_fn=preexec,
+            start_new_session=True,
+        )
+        self.stats: ProcStats | None = None
+
+    def poll(self) -> bool:
+        """Reap the child if it has exited; True once it is gone."""
+        if self.stats is not None:
+            return True
+        pid, status, usage = os.wait4(self.proc.pid, os.WNOHANG)
+        if pid == 0:
+            return False
+        code = os.waitstatus_to_exitcode(status)
+        self.proc.returncode = code
+        self.stats = ProcStats(
+            name=self.name,
+            code=code if code >= 0 else 128 - code,
+            signal=signal.Signals(-code).name if code < 0 else None,
+            wall_ms=(time.monotonic() - self.start) * 1000,
+            cpu_ms=(usage.ru_utime + usage.ru_stime) * 1000,
+            peak_mb=usage.ru_maxrss * MAXRSS_TO_MB,
+        )
+        return True
+
+    def kill(self) -> None:
+        if self.stats is None:
+            try:
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+
+def judge(
+    interactor: ProcStats,
+    solution: ProcStats,
+    limits: Limits,
+    killed: tuple[str, str] | None,
+) -> tuple[str, str]:
+    if killed:
+        return killed
+    if solution.signal == "SIGXCPU" or (
+        limits.timeout_ms > 0 and solution.cpu_ms > limits.timeout_ms
+    ):
+        return "TLE", f"cpu time {solution.cpu_ms:.0f} ms"
+    # Allocations usually fail on RLIMIT_AS a little before the peak reaches
+    # the limit, so a solution that got close counts as MLE.
+    if limits.memory_mb > 0 and solution.peak_mb >= MLE_FRACTION * limits.memory_mb:
+        return "MLE", f"peak memory {solution.peak_mb:.1f} MB"
+    # A solution killed by SIGPIPE only lost its reader: the interactor
+    # stopped listening, so its exit code decides.
+    if solution.code != 0 and solution.signal != "SIGPIPE":
+        return "RE", f"solution exited with {solution.signal or solution.code}"
+    if interactor.code != 0:
+        return "WA", f"interactor exited with {interactor.signal or interactor.code}"
+    return "AC", ""
+
+
+def watch(
+    children: Sequence[Child], echo: Echo, limits: Limits
+) -> tuple[str, str] | None:
+    """Wait for both children, killing them on a limit, deadlock or MLE."""
+    solution = children[-1]
+    killed: tuple[str, str] | None = None
+    cpu_seen: dict[int, int] = {}
+    while not all(c.poll() for c in children):
+        time.sleep(POLL_S)
+        if killed:
+            continue
+        now = time.monotonic()
+        if limits.wall_ms and (now - solution.start) * 1000 > limits.wall_ms:
+            killed = ("TLE", f"wall time over {limits.wall_ms:.0f} ms")
+        for c in children:
+            s = sample(c.proc.pid) if c.stats is None else None
+            if s is None:
+                continue
+            ticks, rss_mb = s
+            if cpu_seen.get(c.proc.pid) != ticks:
+                cpu_seen[c.proc.pid] = ticks
+                echo.last_activity = now
+            if c is solution and 0 < limits.memory_mb < rss_mb:
+                killed = ("MLE", f"resident memory over {limits.memory_mb:g} MB")
+        idle_ms = (now - echo.last_activity) * 1000
+        if not killed and 0 < limits.idle_timeout_ms < idle_ms:
+            killed = ("IDLE", f"no progress for {limits.idle_timeout_ms} ms")
+        if killed:
+            for c in children:
+                c.kill()
+    return killed
+
+
+def main(
+    interactor_cmd: Sequence[str],
+    interactee_cmd: Sequence[str],
+    transcript: str | None = None,
+    limits: Limits | None = None,
+) -> dict[str, Any]:
+    limits = limits or Limits()
+    interactor = Child("interactor", interactor_cmd, None)
+    solution = Child("solution", interactee_cmd, limits.apply)
     assert (
-        interactor.stdout
-        and interactor.stdin
-        and interactee.stdout
-        and interactee.stdin
+        interactor.proc.stdout
+        and interactor.proc.stdin
+        and solution.proc.stdout
+        and solution.proc.stdin
     )
 
-    tasks = [
-        asyncio.create_task(pump(interactor.stdout, interactee.stdin)),
-        asyncio.create_task(pump(interactee.stdout, interactor.stdin)),
+    out = open(transcript, "wb") if transcript else sys.stdout.buffer
+    echo = Echo(out, flush=transcript is None)
+    pumps = [
+        threading.Thread(
+            target=pump,
+            args=(
+                interactor.proc.stdout.fileno(),
+                os.dup(solution.proc.stdin.fileno()),
+                echo,
+            ),
+        ),
+        threading.Thread(
+            target=pump,
+            args=(
+                solution.proc.stdout.fileno(),
+                os.dup(interactor.proc.stdin.fileno()),
+                echo,
+            ),
+        ),
     ]
-    _ = await asyncio.wait(tasks, return_when=asyncio.ALL_COMPLETED)
-    _ = await interactor.wait()
-    _ = await interactee.wait()
+    interactor.proc.stdin.close()
+    solution.proc.stdin.close()
+    for t in pumps:
+        t.start()
 
+    killed = watch((interactor, solution), echo, limits)
+    for t in pumps:
+        t.join()
+    echo.close()
+    if transcript:
+        out.close()
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: interact.py <interactor> <interactee>", file=sys.stderr)
-        sys.exit(1)
+    assert interactor.stats and solution.stats
+    verdict, reason = judge(interactor.stats, solution.stats, limits, killed)
+    return {
+        "verdict": verdict,
+        "reason": reason,
+        "interactor": asdict(interactor.stats),
+        "solution": asdict(solution.stats),
+    }
 
-    interactor_cmd = shlex.split(sys.argv[1])
-    interactee_cmd = shlex.split(sys.argv[2])
 
-    _ = asyncio.run(main(interactor_cmd, interactee_cmd))
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("interactor")
+    parser.add_argument("interactee")
+    parser.add_argument(
+        "--transcript", help="write the dialogue here instead of to stdout"
+    )
+    parser.add_argument("--timeout-ms", type=int, default=0)
+    parser.add_argument("--memory-mb", type=float, default=0)
+    parser.add_argument("--idle-timeout-ms", type=int, default=DEFAULT_IDLE_TIMEOUT_MS)
+    args = parser.parse_args()
+
+    result = main(
+        shlex.split(args.interactor),
+        shlex.split(args.interactee),
+        args.transcript,
+        Limits(args.timeout_ms, args.memory_mb, args.idle_timeout_ms),
+    )
+    for name in ("interactor", "solution"):
+        print(ProcStats(**result[name]).describe(), file=sys.stderr)
+    print(json.dumps(result), file=sys.stderr)
+    sys.exit(0 if result["verdict"] == "AC" else 1)
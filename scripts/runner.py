@@ -0,0 +1,314 @@
+"""Run a solution against many test cases in parallel.
+
+Test cases are read from stdin as NDJSON objects ``{"index": 1, "input":
+"..."}``, or from ``.cpin`` files matched by ``--io-glob`` with the answer in
+the ``.cpout`` beside each. Each case runs in its own process on a pool of
+``--jobs`` workers (one per core by default).
+Wall time, CPU time and peak RSS come straight from ``os.wait4`` rather than
+from GNU time, and a result line is printed as soon as each case finishes:
+
+    {"index": 1, "stdout": "...", "code": 0, "signal": null, "time_ms": 3.1,
+     "cpu_ms": 1.2, "peak_mb": 3.4, "tled": false, "mled": false,
+     "truncated": false}
+
+When a case also carries ``"expected"``, the full output is spooled to a
+temporary file and compared by ``check.py`` in the ``--check`` mode (by
+default ``lines``, the plugin's own comparison), adding ``"ok"`` and, on a
+wrong answer, the first ``"mismatch"`` to the result.
+
+A final ``{"done": true, ...}`` line carries the totals.
+"""
+
+import argparse
+import glob
+import json
+import mmap
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from typing import IO, Any
+
+import check
+
+MAX_OUTPUT_BYTES = 8 * 1024 * 1024
+KILL_GRACE_S = 1.0
+OOM_HINTS = (
+    "std::bad_alloc",
+    "cannot allocate memory",
+    "out of memory",
+    "memoryerror",
+    "enomem",
+)
+# ru_maxrss is KiB on Linux and bytes on macOS.
+MAXRSS_TO_MB = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+
+
+@dataclass
+class Case:
+    index: int
+    input: bytes
+    expected: bytes | None = None
+
+
+@dataclass
+class Limits:
+    timeout_ms: int
+    memory_mb: float
+
+
+@dataclass
+class Checker:
+    mode: str = "lines"
+    abs_eps: float = check.DEFAULT_EPS
+    rel_eps: float = check.DEFAULT_EPS
+
+
+def _limited(cmd: Sequence[str], limits: Limits) -> list[str]:
+    """``cmd`` behind a shell that sets its rlimits and then execs it.
+
+    Cases are spawned from pool threads, where ``preexec_fn`` could deadlock
+    the child before exec.
+    """
+    script: list[str] = []
+    if limits.memory_mb > 0:
+        script.append(f"ulimit -v {int(limits.memory_mb * 1024)}")
+    if limits.timeout_ms > 0:
+        cpu_s = -(-limits.timeout_ms // 1000) + 1
+        script.append(f"ulimit -St {cpu_s} && ulimit -Ht {cpu_s + 1}")
+    if not script:
+        return list(cmd)
+    return ["/bin/sh", "-c", " && ".join([*script, 'exec "$@"']), "sh", *cmd]
+
+
+def _feed(pipe: Any, data: bytes) -> None:
+    try:
+        pipe.write(data)
+    except (BrokenPipeError, OSError):
+        pass
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def _drain(
+    pipe: Any,
+    out: bytearray,
+    limit: int,
+    flags: dict[str, bool],
+    spool: IO[bytes] | None,
+) -> None:
+    while chunk := pipe.read1(65536):
+        if spool is not None:
+            spool.write(chunk)
+        room = limit - len(out)
+        if room > 0:
+            out += chunk[:room]
+        if len(chunk) > room:
+            flags["truncated"] = True
+
+
+def _kill_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _spawn_error(case: Case, e: OSError) -> dict[str, Any]:
+    return {
+        "index": case.index,
+        "stdout": f"{e.filename or ''}: {e.strerror}",
+        "code": 127,
+        "signal": None,
+        "time_ms": 0.0,
+        "cpu_ms": 0.0,
+        "peak_mb": 0.0,
+        "tled": False,
+        "mled": False,
+        "truncated": False,
+    }
+
+
+def _check(case: Case, spool: IO[bytes], checker: Checker) -> dict[str, Any]:
+    assert case.expected is not None
+    spool.flush()
+    try:
+        actual: Any = mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped.
+        actual = b""
+    try:
+        first = check.compare(
+            case.expected, actual, checker.mode, checker.abs_eps, checker.rel_eps
+        )
+    finally:
+        if isinstance(actual, mmap.mmap):
+            actual.close()
+    if first is None:
+        return {"ok": True}
+    return {"ok": False, "mismatch": asdict(first)}
+
+
+def run_case(
+    cmd: Sequence[str], case: Case, limits: Limits, checker: Checker | None = None
+) -> dict[str, Any]:
+    start = time.monotonic()
+    try:
+        proc = subprocess.Popen(
+            _limited(cmd, limits),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
+    except OSError as e:
+        return _spawn_error(case, e)
+    assert proc.stdin and proc.stdout
+    out = bytearray()
+    flags = {"truncated": False, "tled": False}
+    spool = tempfile.TemporaryFile() if case.expected is not None else None
+    writer = threading.Thread(target=_feed, args=(proc.stdin, case.input))
+    reader = threading.Thread(
+        target=_drain, args=(proc.stdout, out, MAX_OUTPUT_BYTES, flags, spool)
+    )
+    writer.start()
+    reader.start()
+
+    timer = None
+    if limits.timeout_ms > 0:
+
+        def expire() -> None:
+            flags["tled"] = True
+            _kill_group(proc.pid)
+
+        timer = threading.Timer(limits.timeout_ms / 1000, expire)
+        timer.start()
+
+    _, status, usage = os.wait4(proc.pid, 0)
+    wall_ms = (time.monotonic() - start) * 1000
+    if timer is not None:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # Orphaned grandchildren may still hold the pipe open.
+    _kill_group(proc.pid)
+    writer.join()
+    reader.join(KILL_GRACE_S)
+    if not reader.is_alive():
+        proc.stdout.close()
+
+    code = proc.returncode
+    sig = None
+    if code < 0:
+        sig = signal.Signals(-code).name
+        code = 128 - code
+    cpu_ms = (usage.ru_utime + usage.ru_stime) * 1000
+    peak_mb = usage.ru_maxrss * MAXRSS_TO_MB
+    stdout = out.decode("utf-8", errors="replace")
+    tled = flags["tled"] or sig == "SIGXCPU"
+    lower = stdout.lower()
+    oom = any(h in lower for h in OOM_HINTS)
+    mled = limits.memory_mb > 0 and (
+        peak_mb >= 0.9 * limits.memory_mb or (oom and not tled)
+    )
+    result = {
+        "index": case.index,
+        "stdout": stdout,
+        "code": code,
+        "signal": sig,
+        "time_ms": round(wall_ms, 3),
+        "cpu_ms": round(cpu_ms, 3),
+        "peak_mb": round(peak_mb, 3),
+        "tled": tled,
+        "mled": mled,
+        "truncated": flags["truncated"],
+    }
+    if spool is not None:
+        with spool:
+            if not reader.is_alive():
+                result.update(_check(case, spool, checker or Checker()))
+    return result
+
+
+def _case_number(path: str) -> int:
+    m = re.search(r"\.(\d+)\.cpin$", path)
+    return int(m.group(1)) if m else 0
+
+
+def read_cases(io_glob: str | None) -> Iterator[Case]:
+    if io_glob:
+        for i, path in enumerate(sorted(glob.glob(io_glob), key=_case_number), 1):
+            with open(path, "rb") as f:
+                data = f.read()
+            expected = None
+            answer = path[: -len(".cpin")] + ".cpout"
+            if os.path.exists(answer):
+                with open(answer, "rb") as f:
+                    expected = f.read()
+            yield Case(_case_number(path) or i, data, expected)
+        return
+    for i, line in enumerate(sys.stdin, 1):
+        if line.strip():
+            obj = json.loads(line)
+            expected = obj.get("expected")
+            yield Case(
+                int(obj.get("index", i)),
+                obj.get("input", "").encode(),
+                None if expected is None else expected.encode(),
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--timeout-ms", type=int, default=0)
+    parser.add_argument("--memory-mb", type=float, default=0)
+    parser.add_argument("--io-glob", help="read cases from matching .cpin files")
+    parser.add_argument("--check", choices=check.MODES, default="lines")
+    parser.add_argument("--abs-eps", type=float, default=check.DEFAULT_EPS)
+    parser.add_argument("--rel-eps", type=float, default=check.DEFAULT_EPS)
+    parser.add_argument("cmd", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    cmd = args.cmd[1:] if args.cmd[:1] == ["--"] else args.cmd
+    if not cmd:
+        parser.error("missing command to run")
+    limits = Limits(args.timeout_ms, args.memory_mb)
+    checker = Checker(args.check, args.abs_eps, args.rel_eps)
+    cases = list(read_cases(args.io_glob))
+
+    start = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [pool.submit(run_case, cmd, c, limits, checker) for c in cases]
+        for fut in as_completed(futures):
+            result = fut.result()
+            failed += (
+                result["code"] != 0
+                or result["tled"]
+                or result["mled"]
+                or result.get("ok") is False
+            )
+            sys.stdout.write(json.dumps(result) + "\n")
+            sys.stdout.flush()
+    summary = {
+        "done": True,
+        "total": len(cases),
+        "failed": failed,
+        "wall_ms": round((time.monotonic() - start) * 1000, 3),
+    }
+    sys.stdout.write(json.dumps(summary) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
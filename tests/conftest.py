@@ -12,10 +12,17 @@ import pytest
 import requests
 from scrapling import fetchers
 
+from scrapers.fetch import TokenBucket
+
 ROOT = Path(__file__).resolve().parent.parent
 FIX = Path(__file__).resolve().parent / "fixtures"
 
 
+@pytest.fixture(autouse=True)
+def isolated_scraper_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("CP_SCRAPER_CACHE_DIR", str(tmp_path / "cache"))
+
+
 @pytest.fixture
 def fixture_text():
     def _load(name: str) -> str:
@@ -50,7 +57,10 @@ def _capture_stdout(coro):
 
 
 @pytest.fixture
-def run_scraper_offline(fixture_text):
+def run_scraper_offline(fixture_text, monkeypatch):
+    # Fixtures are served locally, so there is nothing to pace.
+    monkeypatch.setattr(TokenBucket, "_reserve", lambda self: 0.0)
+
     def _router_cses(*, path: str | None = None, url: str | None = None) -> str:
         if not path and not url:
             raise AssertionError("CSES expects path or url")
@@ -113,6 +123,7 @@ def run_scraper_offline(fixture_text):
                     return SimpleNamespace(
                         text=html,
                         status_code=200,
+                        headers={},
                         raise_for_status=lambda: None,
                     )
 
@@ -122,15 +133,10 @@ def run_scraper_offline(fixture_text):
 
             case "atcoder":
 
-                def __offline_fetch(url: str, *args, **kwargs):
-                    html = _router_atcoder(url=url)
-                    return html
-
                 async def __offline_get_async(client, url: str, **kwargs):
                     return _router_atcoder(url=url)
 
                 return {
-                    "_fetch": __offline_fetch,
                     "_get_async": __offline_get_async,
                 }
 
@@ -139,6 +145,8 @@ def run_scraper_offline(fixture_text):
                 class MockCodeForcesPage:
                     def __init__(self, html: str):
                         self.html_content = html
+                        self.status = 200
+                        self.headers = {}
 
                 def _mock_stealthy_fetch(url: str, **kwargs):
                     return MockCodeForcesPage(_router_codeforces(url=url))
@@ -162,6 +170,10 @@ def run_scraper_offline(fixture_text):
                         }
 
                         class R:
+                            status_code = 200
+                            headers: dict[str, str] = {}
+                            text = json.dumps(data)
+
                             def json(self_inner):
                                 return data
 
@@ -179,9 +191,11 @@ def run_scraper_offline(fixture_text):
             case "codechef":
 
                 class MockResponse:
-                    def __init__(self, json_data):
+                    def __init__(self, json_data, text=None):
                         self._json_data = json_data
                         self.status_code = 200
+                        self.headers = {}
+                        self.text = json.dumps(json_data) if text is None else text
 
                     def json(self):
                         return self._json_data
@@ -210,24 +224,13 @@ def run_scraper_offline(fixture_text):
                             fixture_text(f"codechef/{contest_id}_{problem_id}.json")
                         )
                         return MockResponse(data)
-                    raise AssertionError(f"No fixture for CodeChef url={url!r}")
-
-                class MockCodeChefPage:
-                    def __init__(self, html: str):
-                        self.body = html
-                        self.status = 200
-
-                def _mock_stealthy_fetch(url: str, **kwargs):
                     if "/problems/" in url:
                         problem_id = url.rstrip("/").split("/")[-1]
                         html = fixture_text(f"codechef/{problem_id}.html")
-                        return MockCodeChefPage(html)
+                        return MockResponse(None, html)
                     raise AssertionError(f"No fixture for CodeChef url={url!r}")
 
-                return {
-                    "__offline_get_async": __offline_get_async,
-                    "Fetcher.get": _mock_stealthy_fetch,
-                }
+                return {"__offline_get_async": __offline_get_async}
 
             case _:
                 raise AssertionError(f"Unknown scraper: {scraper_name}")
@@ -248,13 +251,11 @@ def run_scraper_offline(fixture_text):
             fetchers.Fetcher.get = offline_fetches["Fetcher.get"]
             requests.get = offline_fetches["requests.get"]
         elif scraper_name == "atcoder":
-            ns._fetch = offline_fetches["_fetch"]
             ns._get_async = offline_fetches["_get_async"]
         elif scraper_name == "cses":
             httpx.AsyncClient.get = offline_fetches["__offline_fetch_text"]
         elif scraper_name == "codechef":
             httpx.AsyncClient.get = offline_fetches["__offline_get_async"]
-            fetchers.Fetcher.get = offline_fetches["Fetcher.get"]
 
         scraper_class = getattr(ns, scraper_classes[scraper_name])
         scraper = scraper_class()
@@ -0,0 +1,34 @@
+import asyncio
+from pathlib import Path
+
+from scrapers import atcoder
+from scrapers.models import ContestSummary
+
+FIXTURE = Path(__file__).parent / "fixtures" / "atcoder" / "contests.html"
+
+
+def test_refresh_stops_at_first_known_contest(monkeypatch):
+    html = FIXTURE.read_text(encoding="utf-8")
+    _, page = atcoder._parse_archive_page(html)
+    fetched = []
+
+    async def fake_get(client, url, **kwargs):
+        fetched.append(url)
+        return html
+
+    monkeypatch.setattr(atcoder, "_get_async", fake_get)
+    stale = ContestSummary(id=page[2].id, name="old name")
+    older = ContestSummary(id="abc001", name="AtCoder Beginner Contest 001")
+    out = asyncio.run(atcoder._refresh_contests_async(None, [stale, older]))
+
+    assert fetched == [atcoder.ARCHIVE_URL]
+    assert [c.id for c in out] == [c.id for c in page] + ["abc001"]
+    assert out[2].name == page[2].name
+
+
+def test_task_pages_are_pinned_only_after_the_contest_ends():
+    html = (FIXTURE.parent / "task_abc100_a.html").read_text(encoding="utf-8")
+    assert atcoder._contest_page_ttl(html) == atcoder.TTL_IMMUTABLE
+    live = html.replace("2018-06-16T22:40:00+09:00", "2999-01-01T00:00:00+09:00")
+    assert atcoder._contest_page_ttl(live) == 0
+    assert atcoder._contest_page_ttl("<html></html>") == 0
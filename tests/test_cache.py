@@ -0,0 +1,77 @@
+import asyncio
+
+from scrapers.cache import (
+    ResponseCache,
+    TextResponse,
+    cache_dir,
+    fetch_cached,
+    fetch_cached_async,
+    load_state,
+    save_state,
+)
+
+URL = "https://example.com/contest/1/problems"
+
+
+def _sender(responses):
+    calls = []
+
+    def send(extra):
+        calls.append(extra)
+        return responses.pop(0)
+
+    return send, calls
+
+
+def test_fresh_entry_is_served_without_network():
+    send, calls = _sender([TextResponse(200, "body", {"etag": '"v1"'})])
+    assert fetch_cached(URL, send, 60) == "body"
+    assert fetch_cached(URL, send, 60) == "body"
+    assert calls == [{}]
+
+
+def test_stale_entry_is_revalidated_with_validators():
+    send, calls = _sender(
+        [TextResponse(200, "body", {"etag": '"v1"'}), TextResponse(304, "", {})]
+    )
+    assert fetch_cached(URL, send, 1e-6) == "body"
+    assert fetch_cached(URL, send, 60) == "body"
+    assert calls == [{}, {"If-None-Match": '"v1"'}]
+    assert fetch_cached(URL, send, 60) == "body"
+    assert len(calls) == 2
+
+
+def test_non_positive_ttl_is_not_stored():
+    send, calls = _sender([TextResponse(200, "a", {}), TextResponse(200, "b", {})])
+    assert fetch_cached(URL, send, 0) == "a"
+    assert fetch_cached(URL, send, 0) == "b"
+    assert len(calls) == 2
+
+
+def test_async_path_shares_the_same_store():
+    async def send(extra):
+        return TextResponse(200, "async body", {})
+
+    assert asyncio.run(fetch_cached_async(URL, send, 60)) == "async body"
+    assert fetch_cached(URL, lambda extra: TextResponse(500, "", {}), 60) == (
+        "async body"
+    )
+
+
+def test_lru_eviction_keeps_store_under_budget(tmp_path):
+    cache = ResponseCache(tmp_path / "lru.sqlite3", max_bytes=10)
+    cache.put("a", "aaaa", {}, 60)
+    cache.put("b", "bbbb", {}, 60)
+    assert cache.get("a") is not None
+    cache.put("c", "cccc", {}, 60)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_state_round_trip_and_corrupt_file():
+    assert load_state("archive") is None
+    save_state("archive", {"ids": [1, 2]})
+    assert load_state("archive") == {"ids": [1, 2]}
+    (cache_dir() / "archive.json").write_text("{", encoding="utf-8")
+    assert load_state("archive") is None
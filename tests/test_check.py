@@ -0,0 +1,98 @@
+import importlib.util
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+CHECK = Path(__file__).resolve().parent.parent / "scripts" / "check.py"
+
+_spec = importlib.util.spec_from_file_location("check", CHECK)
+assert _spec and _spec.loader
+check = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(check)
+
+
+def test_whitespace_mode_ignores_layout_but_not_tokens():
+    assert check.compare(b"1 2\n3\n", b"  1\n2 3") is None
+    first = check.compare(b"1 2\n3\n", b"1 2\n4\n")
+    assert first is not None
+    assert (first.offset, first.line, first.expected, first.actual) == (
+        4,
+        2,
+        "3",
+        "4",
+    )
+
+
+def test_missing_and_extra_tokens_are_reported_at_the_end():
+    first = check.compare(b"1 2 3", b"1 2")
+    assert first is not None
+    assert (first.offset, first.expected, first.actual) == (3, "3", None)
+    first = check.compare(b"1", b"1 2")
+    assert first is not None
+    assert (first.offset, first.expected, first.actual) == (2, None, "2")
+
+
+def test_exact_mode_reports_the_first_differing_byte():
+    assert check.compare(b"abc\n", b"abc\n", "exact") is None
+    first = check.compare(b"abc\n", b"abc \n", "exact")
+    assert first is not None
+    assert (first.offset, first.expected, first.actual) == (3, "\n", " ")
+
+
+def test_float_mode_accepts_absolute_or_relative_error():
+    assert check.compare(b"0.5 1000000", b"0.5000001 1000000.5", "float") is None
+    assert check.compare(b"1e9", b"1000000100", "float", 0, 1e-6) is None
+    first = check.compare(b"0.5 YES", b"0.5001 YES", "float")
+    assert first is not None and first.actual == "0.5001"
+    first = check.compare(b"nan", b"1", "float")
+    assert first is not None
+
+
+def test_tokens_split_across_blocks(monkeypatch):
+    monkeypatch.setattr(check, "BLOCK", 7)
+    expected = b" ".join(str(i).encode() for i in range(200))
+    actual = expected.replace(b" ", b"\n")
+    assert check.compare(expected, actual) is None
+    first = check.compare(expected, actual.replace(b"\n150\n", b"\n151\n"))
+    assert first is not None
+    assert (first.line, first.expected, first.actual) == (151, "150", "151")
+    assert actual[first.offset : first.offset + 3] == b"150"
+
+
+def test_cli_maps_files_and_prints_the_verdict(tmp_path):
+    (tmp_path / "want").write_bytes(b"1\n2\n")
+    (tmp_path / "got").write_bytes(b"1\n3\n")
+    (tmp_path / "empty").write_bytes(b"")
+    proc = subprocess.run(
+        [sys.executable, str(CHECK), str(tmp_path / "want"), str(tmp_path / "got")],
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 1
+    assert json.loads(proc.stdout)["expected_line"] == 2
+    proc = subprocess.run(
+        [sys.executable, str(CHECK), str(tmp_path / "empty"), str(tmp_path / "empty")],
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode == 0
+
+
+def test_lines_mode_matches_the_plugin_line_comparison():
+    assert check.compare(b"1 2\n\n3\n", b"  1 2  \r\n3\n\n", "lines") is None
+    first = check.compare(b"1 2\n", b"1\n2\n", "lines")
+    assert first is not None
+    assert (first.offset, first.expected, first.actual) == (0, "1 2", "1")
+    first = check.compare(b"1\n2\n", b"1\n", "lines")
+    assert first is not None
+    assert (first.offset, first.expected, first.actual) == (2, "2", None)
+
+
+def test_lines_split_across_blocks(monkeypatch):
+    monkeypatch.setattr(check, "BLOCK", 5)
+    expected = b"".join(b"%d %d\n" % (i, i) for i in range(100))
+    assert check.compare(expected, expected.replace(b"\n", b" \n\n"), "lines") is None
+    first = check.compare(expected, expected.replace(b"\n70 70", b"\n70 71"), "lines")
+    assert first is not None
+    assert (first.line, first.expected, first.actual) == (71, "70 70", "70 71")
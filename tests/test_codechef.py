@@ -0,0 +1,52 @@
+import asyncio
+import json
+
+from scrapers import codechef
+
+
+def test_problem_api_has_no_memory_limit(fixture_text):
+    # Recorded from /api/contests/START209D/problems/P1209: only the time and
+    # source size limits are there, so the memory limit needs the page.
+    data = json.loads(fixture_text("codechef/START209D_P1209.json"))
+    assert data["max_timelimit"] == "1"
+    assert not [k for k in data if "mem" in k.lower()]
+
+
+def test_memory_limit_missing_from_page_is_not_remembered(monkeypatch):
+    fetched = []
+
+    async def fake_fetch_text(client, url, ttl):
+        fetched.append(ttl("<html>no limits here</html>"))
+        return "<html>no limits here</html>"
+
+    monkeypatch.setattr(codechef, "fetch_text", fake_fetch_text)
+
+    async def run() -> list[float]:
+        scraper = codechef.CodeChefScraper()
+        limits = [await scraper._memory_limit(None, "P1") for _ in range(2)]
+        assert scraper._memory_limits == {}
+        return limits
+
+    assert asyncio.run(run()) == [codechef.DEFAULT_MEMORY_MB] * 2
+    assert fetched == [0, 0]
+
+
+def test_memory_limit_page_is_fetched_once_per_problem(monkeypatch, fixture_text):
+    fetched = []
+
+    async def fake_fetch_text(client, url, ttl):
+        fetched.append(url)
+        return fixture_text("codechef/P1209.html")
+
+    monkeypatch.setattr(codechef, "fetch_text", fake_fetch_text)
+
+    async def run() -> list[float]:
+        scraper = codechef.CodeChefScraper()
+        limits = [await scraper._memory_limit(None, "P1209") for _ in range(2)]
+        codechef.save_state(codechef.MEMORY_STATE, scraper._memory_limits)
+        # A fresh scraper, as in a new process, reads the remembered limit.
+        fresh = codechef.CodeChefScraper()
+        return [*limits, await fresh._memory_limit(None, "P1209")]
+
+    assert asyncio.run(run()) == [1536.0, 1536.0, 1536.0]
+    assert fetched == [codechef.PROBLEM_URL.format(problem_id="P1209")]
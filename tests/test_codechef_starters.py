@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+
+from scrapers import codechef
+
+FINISHED = {"end": 100, "current": 200}
+RUNNING = {"end": 300, "current": 200}
+
+
+def _parent(n: int, time: dict) -> dict:
+    return {
+        "time": time,
+        "child_contests": {
+            "div_1": {"contest_code": f"START{n}A", "div": {"div_number": "1"}},
+            "div_2": {"contest_code": f"START{n}B", "div": {"div_number": "2"}},
+        },
+    }
+
+
+def test_starters_are_rechecked_only_when_unfinished_and_stale(monkeypatch):
+    fetched = []
+    clock = [1000.0]
+
+    async def fake_fetch_json(client, path, ttl=None):
+        if path == codechef.API_CONTESTS_ALL:
+            return {"future_contests": [{"contest_code": "START4"}]}
+        fetched.append(path)
+        n = int(path.rsplit("START", 1)[1])
+        if n == 2:
+            request = httpx.Request("GET", path)
+            raise httpx.HTTPStatusError(
+                "404", request=request, response=httpx.Response(404, request=request)
+            )
+        return _parent(n, RUNNING if n == 4 else FINISHED)
+
+    monkeypatch.setattr(codechef, "fetch_json", fake_fetch_json)
+    monkeypatch.setattr(codechef.time, "time", lambda: clock[0])
+    scraper = codechef.CodeChefScraper()
+
+    first = asyncio.run(scraper.scrape_contest_list())
+    assert len(fetched) == 4
+    fetched.clear()
+    second = asyncio.run(scraper.scrape_contest_list())
+    assert fetched == []
+    assert first.contests == second.contests
+    assert [c.id for c in second.contests[:2]] == ["START1A", "START1B"]
+    assert second.contests[0].display_name == "Starters 1 (Div. 1)"
+    assert "START2A" not in {c.id for c in second.contests}
+
+    # The running round and the gap are checked again once stale.
+    clock[0] += codechef.STARTERS_RECHECK_S
+    asyncio.run(scraper.scrape_contest_list())
+    assert sorted(fetched) == [
+        codechef.API_CONTEST.format(contest_id=f"START{n}") for n in (2, 4)
+    ]
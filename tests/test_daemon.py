@@ -0,0 +1,117 @@
+import asyncio
+import json
+import os
+import sys
+
+from scrapers import daemon
+from scrapers.base import BaseScraper
+
+
+class FakeScraper(BaseScraper):
+    """Streams one problem per contest; contest ``slow`` takes its time."""
+
+    @property
+    def platform_name(self) -> str:
+        return "fake"
+
+    async def scrape_contest_metadata(self, contest_id):
+        raise NotImplementedError
+
+    async def scrape_contest_list(self):
+        raise NotImplementedError
+
+    async def stream_tests_for_category_async(self, category_id: str) -> None:
+        self._emit_manifest(["a"])
+        if category_id == "slow":
+            await asyncio.sleep(0.5)
+        self._emit_problem(self._tests_payload("a", [], 1000, 256))
+
+
+class CapturingDaemon(daemon.ScraperDaemon):
+    def __init__(self) -> None:
+        super().__init__()
+        self._scrapers["fake"] = FakeScraper()
+        self.out: list[dict] = []
+
+    def _write(self, line: bytes) -> None:
+        self.out.append(json.loads(line))
+
+
+def _serve(monkeypatch, *requests: object) -> list[dict]:
+    monkeypatch.setitem(daemon.SCRAPERS, "fake", ("unused", "FakeScraper"))
+    r, w = os.pipe()
+    for req in requests:
+        raw = req if isinstance(req, bytes) else json.dumps(req).encode()
+        os.write(w, raw + b"\n")
+    os.close(w)
+    d = CapturingDaemon()
+    with os.fdopen(r, "rb") as stdin:
+        monkeypatch.setattr(sys, "stdin", stdin)
+        assert asyncio.run(d.serve()) == 0
+    return d.out
+
+
+def _request(req_id: int, method: str, platform: str, *args: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": req_id,
+        "method": method,
+        "params": {"platform": platform, "args": list(args)},
+    }
+
+
+def test_request_streams_events_then_responds(monkeypatch):
+    out = _serve(monkeypatch, _request(1, "tests", "fake", "c1"))
+    *events, response = out
+    assert [e["method"] for e in events] == ["event"] * 3
+    assert all(e["params"]["id"] == 1 for e in events)
+    data = [e["params"]["data"] for e in events]
+    assert data[0]["manifest"] is True
+    assert data[1]["problem_id"] == "a"
+    assert data[2]["done"] is True
+    assert response == {"jsonrpc": "2.0", "id": 1, "result": {"code": 0}}
+
+
+def test_malformed_requests_get_json_rpc_errors(monkeypatch):
+    out = _serve(
+        monkeypatch,
+        b"{not json",
+        [1, 2],
+        _request(3, "tests", "nowhere", "c1"),
+        _request(4, "tests", "fake", "-"),
+        {"jsonrpc": "2.0", "id": 5, "method": "tests", "params": ["fake", "c1"]},
+        {"jsonrpc": "2.0", "id": 6, "method": "tests", "params": {"args": "c1"}},
+        _request(7, "tests", "fake", {"c": 1}),
+        _request(8, "tests", ["fake"], "c1"),
+    )
+    assert [(m["id"], m["error"]["code"]) for m in out] == [
+        (None, daemon.PARSE_ERROR),
+        (None, daemon.INVALID_REQUEST),
+        (3, daemon.METHOD_NOT_FOUND),
+        (4, daemon.INVALID_PARAMS),
+        (5, daemon.INVALID_PARAMS),
+        (6, daemon.INVALID_PARAMS),
+        (7, daemon.INVALID_PARAMS),
+        (8, daemon.METHOD_NOT_FOUND),
+    ]
+
+
+def test_slow_request_does_not_hold_up_others(monkeypatch):
+    out = _serve(
+        monkeypatch,
+        _request(1, "tests", "fake", "slow"),
+        _request(2, "tests", "fake", "fast"),
+    )
+    responses = [m["id"] for m in out if "result" in m]
+    assert responses == [2, 1]
+    fast_done = next(
+        i
+        for i, m in enumerate(out)
+        if m.get("params", {}).get("id") == 2 and "done" in m["params"]["data"]
+    )
+    slow_problem = next(
+        i
+        for i, m in enumerate(out)
+        if m.get("params", {}).get("id") == 1 and "problem_id" in m["params"]["data"]
+    )
+    assert fast_done < slow_problem
@@ -0,0 +1,148 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scrapers import fetch
+from scrapers.models import ScraperConfig
+
+URL = "https://example.com/contest/1"
+CONFIG = ScraperConfig(max_retries=4, backoff_base=0.5, rate_limit_delay=0)
+
+
+def test_bucket_allows_burst_then_paces():
+    bucket = fetch.TokenBucket(rate=10.0, burst=3)
+    waits = [bucket._reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.1, abs=0.01)
+    assert waits[4] == pytest.approx(0.2, abs=0.01)
+
+
+def test_limiter_is_shared_per_host():
+    config = ScraperConfig(rate_limit_delay=0.5, burst=2)
+    a = fetch.host_limiter("https://limited.example/a", config)
+    b = fetch.host_limiter("https://limited.example/b?x=1", config)
+    c = fetch.host_limiter("https://other.example/a", config)
+    assert a is b
+    assert a is not c
+    assert a.rate == 2.0
+
+
+def test_retry_honours_retry_after_without_blocking(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "3"}),
+        httpx.Response(503),
+        httpx.Response(200, text="ok"),
+    ]
+    sleeps = []
+
+    class Client:
+        async def get(self, url, **kwargs):
+            r = responses.pop(0)
+            r.request = httpx.Request("GET", url)
+            return r
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(fetch.asyncio, "sleep", fake_sleep)
+    r = asyncio.run(fetch.get_with_retry(Client(), URL, CONFIG, {}))
+
+    assert r.text == "ok"
+    assert sleeps[0] == 3.0
+    assert len(sleeps) == 2
+
+
+def test_transport_errors_are_retried(monkeypatch):
+    failures = [
+        httpx.ConnectTimeout("connect"),
+        httpx.PoolTimeout("pool"),
+        httpx.RemoteProtocolError("disconnected"),
+    ]
+
+    class Client:
+        async def get(self, url, **kwargs):
+            if failures:
+                raise failures.pop(0)
+            return httpx.Response(200, text="ok", request=httpx.Request("GET", url))
+
+    async def fake_sleep(delay):
+        pass
+
+    monkeypatch.setattr(fetch.asyncio, "sleep", fake_sleep)
+    r = asyncio.run(fetch.get_with_retry(Client(), URL, CONFIG, {}))
+
+    assert r.text == "ok"
+    assert not failures
+
+
+def test_fatal_status_is_not_retried():
+    class Client:
+        calls = 0
+
+        async def get(self, url, **kwargs):
+            Client.calls += 1
+            return httpx.Response(404, request=httpx.Request("GET", url))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(fetch.get_with_retry(Client(), URL, CONFIG, {}))
+    assert Client.calls == 1
+
+
+def test_concurrency_grows_additively_and_halves_once_per_round():
+    limiter = fetch.AdaptiveLimiter(initial=4, ceiling=6)
+    for _ in range(4):
+        limiter.acquire_sync()
+        limiter.release(0.1, 200)
+    assert limiter.limit == pytest.approx(5, abs=0.1)
+
+    for _ in range(4):
+        limiter.acquire_sync()
+    for _ in range(4):
+        limiter.release(0.1, 429)
+    assert int(limiter.limit) == 2
+
+    for _ in range(100):
+        limiter.acquire_sync()
+        limiter.release(0.1, 200)
+    assert limiter.limit == 6
+    limiter.acquire_sync()
+    limiter.release(0.1, 404)
+    assert limiter.limit == 6
+
+
+def test_concurrency_is_cut_when_p95_latency_rises():
+    limiter = fetch.AdaptiveLimiter(initial=8, ceiling=8)
+    for elapsed in [0.1] * fetch.LATENCY_WINDOW + [0.5] * fetch.LATENCY_WINDOW:
+        limiter.acquire_sync()
+        limiter.release(elapsed, 200)
+    assert limiter.limit == 4
+    # A site that stays slow is not cut again.
+    for _ in range(fetch.LATENCY_WINDOW):
+        limiter.acquire_sync()
+        limiter.release(0.5, 200)
+    assert limiter.limit > 4
+
+
+def test_waiters_are_admitted_in_order_and_cancelled_ones_skipped():
+    limiter = fetch.AdaptiveLimiter(initial=1, ceiling=1)
+    order = []
+
+    async def request(name):
+        async with limiter.slot() as outcome:
+            order.append(name)
+            await asyncio.sleep(0.01)
+            outcome.status = 200
+
+    async def main():
+        first = asyncio.create_task(request("a"))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(request("b"))
+        last = asyncio.create_task(request("c"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(first, last)
+
+    asyncio.run(main())
+    assert order == ["a", "c"]
+    assert limiter.in_flight == 0
@@ -0,0 +1,109 @@
+import asyncio
+import fcntl
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from scrapers import flight
+from scrapers.base import BaseScraper, output_sink
+from scrapers.cache import cache_dir
+
+
+class SlowScraper(BaseScraper):
+    """Streams two problems with a pause between them, counting its scrapes."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.scrapes = 0
+
+    @property
+    def platform_name(self) -> str:
+        return "slow"
+
+    async def scrape_contest_metadata(self, contest_id):
+        raise NotImplementedError
+
+    async def scrape_contest_list(self):
+        raise NotImplementedError
+
+    async def stream_tests_for_category_async(self, category_id: str) -> None:
+        self.scrapes += 1
+        self._emit_manifest(["a", "b"])
+        self._emit_problem(self._tests_payload("a", [], 1000, 256))
+        await asyncio.sleep(0.3)
+        self._emit_problem(self._tests_payload("b", [], 1000, 256))
+
+
+async def _run(scraper: BaseScraper, *args: str) -> tuple[int, list[bytes]]:
+    lines: list[bytes] = []
+    output_sink.set(lines.append)
+    code = await scraper._run_cli_async(["slow", "tests", *args])
+    return code, lines
+
+
+def test_concurrent_identical_requests_share_one_scrape():
+    scraper = SlowScraper()
+
+    async def main():
+        first = asyncio.create_task(_run(scraper, "c1"))
+        await asyncio.sleep(0.1)
+        second, other = await asyncio.gather(_run(scraper, "c1"), _run(scraper, "c2"))
+        return await first, second, other
+
+    first, second, other = asyncio.run(main())
+    assert first[0] == second[0] == 0
+    assert scraper.scrapes == 2
+    assert second[1] == first[1]
+    assert len(first[1]) == 4 and len(other[1]) == 4
+
+    asyncio.run(_run(scraper, "c1"))
+    assert scraper.scrapes == 3
+    assert list((cache_dir() / flight.FLIGHTS_DIR).iterdir()) == []
+
+
+def test_follower_takes_over_when_the_leader_is_cancelled():
+    scraper = SlowScraper()
+
+    async def main():
+        leader = asyncio.create_task(_run(scraper, "c1"))
+        await asyncio.sleep(0.1)
+        follower = asyncio.create_task(_run(scraper, "c1"))
+        await asyncio.sleep(0.1)
+        leader.cancel()
+        return await follower
+
+    code, lines = asyncio.run(main())
+    assert code == 0
+    assert scraper.scrapes == 2
+    # Events replayed before the leader died are not sent again.
+    assert len(lines) == len(set(lines)) == 4
+    assert b'"done"' in lines[-1]
+
+
+def test_follower_ignores_the_spool_of_a_killed_leader(tmp_path):
+    dead_pid = int(
+        subprocess.check_output([sys.executable, "-c", "import os; print(os.getpid())"])
+    )
+    (tmp_path / f"k.{dead_pid}-1.spool").write_bytes(b"stale\n")
+    lock_path = tmp_path / "k.lock"
+    lock_path.write_bytes(f"k.{dead_pid}-1.spool".encode())
+    lines = []
+
+    async def main(successor, follower_lock):
+        follower = asyncio.create_task(
+            flight._follow(tmp_path, follower_lock, lines.append, Counter())
+        )
+        await asyncio.sleep(0.2)
+        live = f"k.{os.getpid()}-2.spool"
+        (tmp_path / live).write_bytes(b"fresh\n" + flight.EXIT_PREFIX + b"0}\n")
+        successor.truncate(0)
+        successor.write(live.encode())
+        successor.flush()
+        return await follower
+
+    # The successor holds the lock but has not replaced the name yet.
+    with open(lock_path, "r+b") as successor, open(lock_path, "rb") as follower_lock:
+        fcntl.flock(successor.fileno(), fcntl.LOCK_EX)
+        assert asyncio.run(main(successor, follower_lock)) == 0
+    assert lines == [b"fresh"]
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.import_time import BUDGETS_MS, DEFERRED
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("module", BUDGETS_MS)
+def test_heavy_dependencies_are_deferred(module):
+    code = (
+        f"import sys, {module}\n"
+        f"print(' '.join(m for m in {DEFERRED!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    ).stdout
+    assert out.split() == [], f"{module} eagerly imports {out.strip()}"
@@ -0,0 +1,76 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+INTERACT = Path(__file__).resolve().parent.parent / "scripts" / "interact.py"
+
+INTERACTOR = """
+import sys
+for i in range(1000):
+    print(i, flush=True)
+    if int(sys.stdin.readline()) != 2 * i:
+        sys.exit(1)
+"""
+
+SOLUTION = """
+import sys
+for line in sys.stdin:
+    print(2 * int(line), flush=True)
+"""
+
+
+def _cmd(src: str) -> str:
+    return f"{sys.executable} -c '{src}'"
+
+
+def test_interact_relays_dialogue_and_reports_stats(tmp_path):
+    transcript = tmp_path / "dialogue.txt"
+    proc = subprocess.run(
+        [
+            sys.executable,
+            str(INTERACT),
+            _cmd(INTERACTOR),
+            _cmd(SOLUTION),
+            "--transcript",
+            str(transcript),
+        ],
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert proc.stdout == ""
+    lines = transcript.read_text().split()
+    assert sorted(map(int, lines)) == sorted(
+        [i for i in range(1000)] + [2 * i for i in range(1000)]
+    )
+    report = proc.stderr.splitlines()
+    assert report[0].startswith("interactor: exit 0, wall ")
+    assert report[1].startswith("solution: exit 0, wall ")
+    assert json.loads(report[2])["verdict"] == "AC"
+
+
+SILENT = """
+import time
+time.sleep(30)
+"""
+
+
+def test_interact_kills_deadlocked_session(tmp_path):
+    proc = subprocess.run(
+        [
+            sys.executable,
+            str(INTERACT),
+            _cmd(SILENT),
+            _cmd(SOLUTION),
+            "--transcript",
+            str(tmp_path / "dialogue.txt"),
+            "--idle-timeout-ms",
+            "300",
+        ],
+        capture_output=True,
+        text=True,
+        timeout=20,
+    )
+    assert proc.returncode == 1
+    assert json.loads(proc.stderr.splitlines()[-1])["verdict"] == "IDLE"
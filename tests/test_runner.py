@@ -0,0 +1,81 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+RUNNER = Path(__file__).resolve().parent.parent / "scripts" / "runner.py"
+
+SOLUTION = """
+import sys, time
+n = int(sys.stdin.readline())
+if n == 3:
+    time.sleep(5)
+if n == 4:
+    sys.exit(3)
+if n == 5:
+    import resource
+    print(resource.getrlimit(resource.RLIMIT_AS)[0], *resource.getrlimit(resource.RLIMIT_CPU))
+print(n * 2)
+"""
+
+
+def _run(cases, *flags):
+    stdin = "".join(json.dumps(c) + "\n" for c in cases)
+    proc = subprocess.run(
+        [sys.executable, str(RUNNER), *flags, "--", sys.executable, "-c", SOLUTION],
+        input=stdin,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [json.loads(line) for line in proc.stdout.splitlines()]
+
+
+def test_runner_streams_one_result_per_case_and_a_summary():
+    cases = [{"index": i, "input": f"{i}\n"} for i in (1, 2, 4)]
+    *results, done = _run(cases, "--jobs", "3")
+
+    by_index = {r["index"]: r for r in results}
+    assert sorted(by_index) == [1, 2, 4]
+    assert by_index[1]["stdout"] == "2\n"
+    assert by_index[2]["stdout"] == "4\n"
+    assert by_index[4]["code"] == 3
+    assert all(r["peak_mb"] > 0 and r["cpu_ms"] > 0 for r in results)
+    assert done == {"done": True, "total": 3, "failed": 1, "wall_ms": done["wall_ms"]}
+
+
+def test_runner_kills_cases_past_the_time_limit():
+    (result, _) = _run([{"index": 1, "input": "3\n"}], "--timeout-ms", "300")
+    assert result["tled"] is True
+    assert result["signal"] == "SIGKILL"
+    assert result["time_ms"] < 3000
+
+
+def test_runner_applies_rlimits_to_each_case():
+    cases = [{"index": i, "input": "5\n"} for i in (1, 2)]
+    *results, _ = _run(cases, "--timeout-ms", "1500", "--memory-mb", "512")
+    assert [r["stdout"] for r in results] == ["536870912 3 4\n10\n"] * 2
+
+
+def test_runner_reads_cases_from_io_files(tmp_path):
+    for i in (1, 2):
+        (tmp_path / f"abc100a.{i}.cpin").write_text(f"{i + 10}\n")
+    *results, _ = _run([], "--io-glob", str(tmp_path / "abc100a.*.cpin"))
+    assert sorted((r["index"], r["stdout"]) for r in results) == [
+        (1, "22\n"),
+        (2, "24\n"),
+    ]
+
+
+def test_runner_checks_output_against_the_expected_answer():
+    cases = [
+        {"index": 1, "input": "1\n", "expected": "2"},
+        {"index": 2, "input": "2\n", "expected": "5\n"},
+    ]
+    *results, done = _run(cases)
+    by_index = {r["index"]: r for r in results}
+    assert by_index[1]["ok"] is True
+    assert by_index[2]["ok"] is False
+    assert by_index[2]["mismatch"]["expected"] == "5"
+    assert by_index[2]["mismatch"]["actual"] == "4"
+    assert done["failed"] == 1
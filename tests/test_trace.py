@@ -0,0 +1,44 @@
+import json
+
+from scrapers import trace
+
+
+def test_pop_flag_strips_the_trace_option():
+    assert trace.pop_flag(["cses.py", "--trace", "tests", "x"]) == (
+        ["cses.py", "tests", "x"],
+        "-",
+    )
+    assert trace.pop_flag(["cses.py", "tests", "--trace=t.ndjson"]) == (
+        ["cses.py", "tests"],
+        "t.ndjson",
+    )
+    assert trace.pop_flag(["cses.py", "contests"]) == (["cses.py", "contests"], None)
+
+
+def test_trace_records_fetch_and_parse_spans(run_scraper_offline, tmp_path, capsys):
+    out = tmp_path / "trace.ndjson"
+    trace.start(str(out))
+    try:
+        rc, _ = run_scraper_offline("cses", "tests", "introductory_problems")
+    finally:
+        trace.stop()
+    assert rc == 0
+
+    events = [json.loads(line) for line in out.read_text().splitlines()]
+    *spans, summary = events
+    fetches = [s for s in spans if s["kind"] == "fetch"]
+    parses = [s for s in spans if s["kind"] == "parse"]
+    # Only some task pages have fixtures; the rest fail and say why.
+    ok = [s for s in fetches if "error" not in s]
+    assert ok and parses
+    assert all(s["url"].startswith("https://cses.fi/") for s in fetches)
+    assert all(s["cache"] == "miss" and s["status"] == 200 for s in ok)
+    assert all(s["bytes"] > 0 and "network_ms" in s for s in ok)
+    assert {s["url"] for s in parses} <= {s["url"] for s in ok}
+
+    assert summary["event"] == "summary"
+    assert summary["fetches"] == len(fetches)
+    assert summary["errors"] == len(fetches) - len(ok)
+    assert summary["phases"]["parse_ms"]["n"] == len(parses)
+    assert "network_ms" in capsys.readouterr().err
+    assert not trace.enabled()